@@ -1,36 +1,11 @@
 import streamlit as st
 from streamlit_option_menu import option_menu
-from utils.question_router import render_question
+from utils.question_router import load_registry, preload_dependencies, render_question
 
 st.set_page_config(page_title="Shop Analysis", layout="wide")
 
-CATEGORY_QUESTIONS = {
-    "🎯 Purchase Behavior": [
-        "Q1: At which user levels do purchases occur?",
-        "Q2: Time between install and first purchase?",
-        "Q3: What are the most purchased items?",
-        "Q4: What are the top countries among purchasers?",
-        "Q5: How many users make just one purchase vs. repeat purchases?",
-        "Q6: How does the sequence of purchases evolve?",
-        "Q7: What’s the average purchase frequency per user type?",
-        "Q8: Do high-value purchases happen at higher levels or earlier in the lifecycle?",
-        "Q9: What is the lifetime value (LTV) segmented by first purchase level or product?",
-        "Q10: How do session counts relate to total IAP spend?",
-    ],
-    "👤 Segmentation": [
-        "Q11: Can users be clustered based on spending patterns?",
-        "Q12: Are certain player personas more monetizable?",
-        "Q13: How Do Engagement Profiles Relate to Spend?",
-        "Q14: Which lifetime status metrics best differentiate high-payers from low-payers?",
-    ],
-    "💸 Ad Monetization": [f"Q{n}: Placeholder" for n in range(18, 23)],
-    "🧪 Purchase Intent": [f"Q{n}: Placeholder" for n in range(23, 27)],
-    "⏳ Timing & Sessions": [f"Q{n}: Placeholder" for n in range(27, 30)],
-    "📉 Churn & Lifecycle": [f"Q{n}: Placeholder" for n in range(30, 34)],
-    "🎮 Gameplay": [f"Q{n}: Placeholder" for n in range(34, 40)],
-    "📐 Predictive Modeling": [f"Q{n}: Placeholder" for n in range(40, 43)],
-    "🔍 Cohort & Funnel": [f"Q{n}: Placeholder" for n in range(43, 48)],
-}
+# built from the CATEGORY/QUESTIONS literals of the question modules, which load on first selection
+CATEGORY_QUESTIONS, _ = load_registry()
 
 # with st.sidebar:
 #     category = option_menu("Shop Insights", list(CATEGORY_QUESTIONS.keys()), 
@@ -47,6 +22,7 @@ with st.sidebar:
 st.header(f"{selected_category}")
 selected_question = st.selectbox("Select a question", CATEGORY_QUESTIONS[selected_category])
 render_question(selected_question)
+preload_dependencies()
 
 # if question:
 #     render_question(question)
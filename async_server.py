@@ -0,0 +1,141 @@
+import asyncio
+import json
+import os
+import signal
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST
+from tornado.httpserver import HTTPServer
+from tornado.netutil import bind_sockets
+from tornado.process import fork_processes
+from tornado.web import Application, HTTPError, RequestHandler, stream_request_body
+
+from recommender import (
+    DECODE_SECONDS, PAYLOAD_BYTES, REQUEST_SECONDS, REQUESTS,
+    logger, metrics_payload, recommend, start_logging, stop_logging,
+)
+from utils.nested_json import TopLevelFieldScanner
+
+MAX_CONTENT_LENGTH = int(os.environ.get("ANALYZE_MAX_CONTENT_LENGTH", 1024 * 1024))
+PORT = int(os.environ.get("ANALYZE_ASYNC_PORT", 5005))
+WORKERS = int(os.environ.get("ANALYZE_WORKERS", 1))
+SHUTDOWN_TIMEOUT = float(os.environ.get("ANALYZE_SHUTDOWN_TIMEOUT", 30))
+
+# the only top-level fields recommend() reads; UserState and Analytics are skipped unparsed
+PAYLOAD_FIELDS = ("UserId", "IAPRecords")
+
+# /analyze requests between their headers arriving and their response being sent;
+# each process runs a single IOLoop, so no lock is needed
+_in_flight = 0
+
+
+@stream_request_body
+class AnalyzeHandler(RequestHandler):
+    """
+    /analyze on Tornado. The body is scanned chunk by chunk as it arrives and only
+    UserId and IAPRecords are kept and decoded.
+    """
+
+    def prepare(self):
+        global _in_flight
+        _in_flight += 1
+        self.tracked = True
+        self.request.connection.set_max_body_size(MAX_CONTENT_LENGTH)
+        self.scanner = TopLevelFieldScanner(PAYLOAD_FIELDS)
+        self.invalid = False
+        self.body_size = 0
+        self.decode_seconds = 0.0
+
+    def data_received(self, chunk):
+        self.body_size += len(chunk)
+        if self.invalid:
+            return
+        started = time.perf_counter()
+        try:
+            self.scanner.feed(chunk)
+        except ValueError:
+            self.invalid = True
+        self.decode_seconds += time.perf_counter() - started
+
+    def post(self):
+        try:
+            if self.invalid:
+                raise ValueError
+            started = time.perf_counter()
+            payload = self.scanner.close()
+        except ValueError:
+            raise HTTPError(400, "Body is not a valid JSON object.")
+        DECODE_SECONDS.observe(self.decode_seconds + time.perf_counter() - started)
+        PAYLOAD_BYTES.labels("/analyze").observe(self.body_size)
+
+        self.set_header("Content-Type", "application/json")
+        self.finish(json.dumps(recommend(payload)))
+
+    def _untrack(self):
+        global _in_flight
+        if getattr(self, "tracked", False):
+            self.tracked = False
+            _in_flight -= 1
+
+    def on_finish(self):
+        self._untrack()
+
+    def on_connection_close(self):
+        self._untrack()
+        super().on_connection_close()
+
+
+class MetricsHandler(RequestHandler):
+    def get(self):
+        self.set_header("Content-Type", CONTENT_TYPE_LATEST)
+        self.finish(metrics_payload())
+
+
+def _record_request(handler):
+    # replaces Tornado's access log line with request metrics
+    if isinstance(handler, MetricsHandler):
+        return
+    endpoint = "/analyze" if isinstance(handler, AnalyzeHandler) else "unmatched"
+    REQUEST_SECONDS.labels(endpoint).observe(handler.request.request_time())
+    REQUESTS.labels(endpoint, handler.get_status()).inc()
+
+
+def make_app():
+    return Application(
+        [(r"/analyze", AnalyzeHandler), (r"/metrics", MetricsHandler)],
+        log_function=_record_request,
+    )
+
+
+async def serve(sockets):
+    # after fork_processes, so every worker has its own log listener thread
+    start_logging()
+    server = HTTPServer(make_app(), max_body_size=MAX_CONTENT_LENGTH)
+    server.add_sockets(sockets)
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stopping.set)
+    await stopping.wait()
+
+    # stop accepting, let in-flight requests finish, then close idle keep-alive connections
+    server.stop()
+    deadline = loop.time() + SHUTDOWN_TIMEOUT
+    while _in_flight and loop.time() < deadline:
+        await asyncio.sleep(0.05)
+    if _in_flight:
+        logger.warning("shutdown timed out with requests in flight", extra={"requests": _in_flight})
+    await server.close_all_connections()
+    stop_logging()
+
+
+def main():
+    sockets = bind_sockets(PORT)
+    if WORKERS > 1:
+        fork_processes(WORKERS)
+    asyncio.run(serve(sockets))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Replays a JSONL corpus of /analyze payloads and reports throughput, latency
+percentiles and allocations per request.
+
+    python benchmark.py generate corpus.jsonl --count 2000 --max-records 500 --depth 2
+    python benchmark.py run corpus.jsonl                         # Flask test client, in process
+    python benchmark.py run corpus.jsonl --url http://127.0.0.1:5004 --concurrency 16
+    python benchmark.py run corpus.jsonl --cache warm            # repeat visitors, SKU cache hits
+
+By default every request misses the per-user SKU cache: the warm-up, each --repeat
+pass and the allocation pass send their own copies of the corpus with distinct
+UserIds. --cache warm first sends the whole corpus once, so timed requests hit.
+
+Set ANALYZE_LOG_LEVEL=WARNING to keep per-request log lines out of in-process runs.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from recommender import valid_skus
+
+OTHER_SKUS = [
+    "com.gamebrain.hexasort.removeads",
+    "com.gamebrain.hexasort.starterbundle",
+    "com.gamebrain.hexasort.coinpack",
+]
+
+
+def make_payload(rng, user_id, record_count, depth, state_bytes):
+    """
+    One synthetic /analyze payload. `depth` is how many levels of the purchase
+    history arrive as JSON-encoded strings (0: plain objects, 1: IAPRecords,
+    2: IAPRecords and IAPRecordBook).
+    """
+    records = [
+        {
+            "SkuId": rng.choice(valid_skus) if rng.random() < 0.8 else rng.choice(OTHER_SKUS),
+            "PurchaseTime": 1_700_000_000 + i * 3600,
+            "Price": round(rng.uniform(0.99, 99.99), 2),
+            "TransactionId": f"{user_id}-{i}",
+        }
+        for i in range(record_count)
+    ]
+    book = {"Records": records}
+    if depth >= 2:
+        book = json.dumps(book)
+    purchases = {"IAPRecordBook": book}
+    if depth >= 1:
+        purchases = json.dumps(purchases)
+
+    return {
+        "UserId": user_id,
+        "UserState": json.dumps({"Level": rng.randint(1, 2000), "Blob": "x" * state_bytes}),
+        "Analytics": json.dumps({"Sessions": rng.randint(1, 500), "Country": rng.choice(["US", "TR", "DE", "BR"])}),
+        "IAPRecords": purchases,
+    }
+
+
+def generate(path, count, max_records, depth, state_bytes, seed):
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        for i in range(count):
+            # most users buy little, a few whales buy a lot
+            record_count = min(max_records, int(rng.paretovariate(1.2)) - 1)
+            payload_depth = rng.randint(0, depth)
+            f.write(json.dumps(make_payload(rng, f"user-{i}", record_count, payload_depth, state_bytes)) + "\n")
+    print(f"Wrote {count} payloads to {path}")
+
+
+def load_corpus(path):
+    with open(path, "rb") as f:
+        return [line.rstrip(b"\n") for line in f if line.strip()]
+
+
+def with_user_suffix(bodies, suffix):
+    """
+    Copies of `bodies` with `suffix` appended to every UserId, so they reach the
+    server as users it has not seen.
+    """
+    def rename(payload):
+        if isinstance(payload, dict) and payload.get("UserId") is not None:
+            payload["UserId"] = f"{payload['UserId']}#{suffix}"
+        return payload
+
+    tagged = []
+    for body in bodies:
+        data = json.loads(body)
+        data = [rename(item) for item in data] if isinstance(data, list) else rename(data)
+        tagged.append(json.dumps(data).encode())
+    return tagged
+
+
+def _client_sender(endpoint):
+    from server import app
+    client = app.test_client()
+
+    def send(body):
+        response = client.post(endpoint, data=body, content_type="application/json")
+        if response.status_code != 200:
+            raise RuntimeError(f"{endpoint} answered {response.status_code}")
+    return send
+
+
+def _http_sender(url, endpoint):
+    import requests
+    session = requests.Session()
+
+    def send(body):
+        response = session.post(url.rstrip("/") + endpoint, data=body, headers={"Content-Type": "application/json"})
+        if response.status_code != 200:
+            raise RuntimeError(f"{endpoint} answered {response.status_code}")
+    return send
+
+
+def _timed(send, body):
+    started = time.perf_counter()
+    send(body)
+    return time.perf_counter() - started
+
+
+def measure_latency(bodies, make_sender, concurrency):
+    if concurrency <= 1:
+        send = make_sender()
+        started = time.perf_counter()
+        latencies = [_timed(send, body) for body in bodies]
+        return np.array(latencies), time.perf_counter() - started
+
+    # one sender (session) per worker thread
+    senders = {}
+
+    def run(body):
+        key = threading.get_ident()
+        if key not in senders:
+            senders[key] = make_sender()
+        return _timed(senders[key], body)
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        started = time.perf_counter()
+        latencies = list(pool.map(run, bodies))
+        return np.array(latencies), time.perf_counter() - started
+
+
+def measure_allocation_peaks(bodies, send):
+    """
+    Peak memory traced by tracemalloc while handling each request, in process only.
+    """
+    tracemalloc.start()
+    peaks = []
+    try:
+        for body in bodies:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            send(body)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    return np.array(peaks)
+
+
+def report(latencies, elapsed, peaks=None):
+    ms = latencies * 1000
+    print(f"requests     {len(latencies)}")
+    print(f"throughput   {len(latencies) / elapsed:,.0f} req/s")
+    print("latency ms   " + "  ".join(
+        f"p{q:g}={np.percentile(ms, q):.3f}" for q in (50, 90, 99, 99.9)
+    ) + f"  max={ms.max():.3f}")
+    if peaks is not None:
+        print(f"alloc peak   mean={peaks.mean() / 1024:.1f} KiB  p99={np.percentile(peaks, 99) / 1024:.1f} KiB")
+
+
+def run(path, url, endpoint, repeat, warmup, concurrency, allocations, cache):
+    corpus = load_corpus(path)
+    if cache == "cold":
+        warmup_bodies = with_user_suffix(corpus[:warmup], "warmup")
+        bodies = [body for i in range(repeat) for body in with_user_suffix(corpus, f"pass{i}")]
+        allocation_bodies = with_user_suffix(corpus[:allocations], "allocations")
+    else:
+        warmup_bodies = corpus
+        bodies = corpus * repeat
+        allocation_bodies = corpus[:allocations]
+
+    if url:
+        make_sender = lambda: _http_sender(url, endpoint)
+    else:
+        make_sender = lambda: _client_sender(endpoint)
+
+    warm = make_sender()
+    for body in warmup_bodies:
+        warm(body)
+
+    latencies, elapsed = measure_latency(bodies, make_sender, concurrency)
+    peaks = None
+    if allocations:
+        if url:
+            print("Allocations are only traced in process; ignoring --allocations with --url.")
+        else:
+            peaks = measure_allocation_peaks(allocation_bodies, warm)
+    print(f"sku cache    {cache}")
+    report(latencies, elapsed, peaks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="write a synthetic JSONL corpus")
+    gen.add_argument("path")
+    gen.add_argument("--count", type=int, default=1000)
+    gen.add_argument("--max-records", type=int, default=500)
+    gen.add_argument("--depth", type=int, default=2, choices=(0, 1, 2))
+    gen.add_argument("--state-bytes", type=int, default=2048, help="size of the unused UserState blob")
+    gen.add_argument("--seed", type=int, default=0)
+
+    bench = commands.add_parser("run", help="replay a JSONL corpus against /analyze")
+    bench.add_argument("path")
+    bench.add_argument("--url", help="base URL of a running server; the Flask test client is used when omitted")
+    bench.add_argument("--endpoint", default="/analyze")
+    bench.add_argument("--repeat", type=int, default=1)
+    bench.add_argument("--warmup", type=int, default=100, help="requests sent before timing (cold runs only)")
+    bench.add_argument("--concurrency", type=int, default=1)
+    bench.add_argument("--allocations", type=int, default=200, help="requests to trace with tracemalloc (0 to skip)")
+    bench.add_argument("--cache", choices=("cold", "warm"), default="cold",
+                       help="whether timed requests miss (cold) or hit (warm) the per-user SKU cache")
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        generate(args.path, args.count, args.max_records, args.depth, args.state_bytes, args.seed)
+    else:
+        run(args.path, args.url, args.endpoint, args.repeat, args.warmup, args.concurrency, args.allocations, args.cache)
+
+
+if __name__ == "__main__":
+    main()
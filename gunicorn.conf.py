@@ -0,0 +1,53 @@
+import glob
+import multiprocessing
+import os
+import tempfile
+
+wsgi_app = "server:app"
+bind = os.environ.get("ANALYZE_BIND", "0.0.0.0:5004")
+
+# threads share one process per core; requests are short and mostly CPU-bound JSON work
+worker_class = "gthread"
+workers = int(os.environ.get("ANALYZE_WORKERS", multiprocessing.cpu_count()))
+threads = int(os.environ.get("ANALYZE_THREADS", 4))
+backlog = 2048
+keepalive = 5
+
+timeout = 30
+graceful_timeout = 30
+# recycle workers now and then, jittered so they don't all restart together
+max_requests = 20_000
+max_requests_jitter = 2_000
+
+accesslog = None
+errorlog = "-"
+loglevel = os.environ.get("ANALYZE_LOG_LEVEL", "info").lower()
+
+# several workers each count their own requests; prometheus_client only merges them
+# through a shared directory, which must be in the environment before the app is imported
+if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="analyze-prometheus-")
+
+
+def on_starting(server):
+    # counters left over from a previous run would be merged into this one
+    for path in glob.glob(os.path.join(os.environ["PROMETHEUS_MULTIPROC_DIR"], "*.db")):
+        os.remove(path)
+
+
+def post_fork(server, worker):
+    # a preloaded app started its log listener in the master, which forks without it
+    from server import start_logging
+    start_logging()
+
+
+def worker_exit(server, worker):
+    # drain the JSON log queue before the worker goes away
+    from server import stop_logging
+    stop_logging()
+
+
+def child_exit(server, worker):
+    # drop the dead worker's live series from the shared prometheus directory
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
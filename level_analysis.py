@@ -1,42 +1,17 @@
 import pandas as pd
-import seaborn as sns
 import numpy as np
-from matplotlib import pyplot as plt
 import plotly.express as px
 import streamlit as st
-from sklearn.preprocessing import PolynomialFeatures
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import r2_score
 from sklearn.preprocessing import StandardScaler
 from sklearn.cluster import KMeans
 
-df = pd.read_csv("./level-details.csv")
-
-del df["Event Data Unq Users Level Started (Before X Days)"]
-del df["Event Data Unq Users Level Completed (Before X Days)"]
-
-cols = [
-    "Event Data Level Sequence In Catalog", "Avg Stacks Placed to Complete", "Avg Stacks Placed to Fail", 
-    "Level Churn %", "Level Fail %",
-    "Retry Ratio", "Unique Level Fail %", "Avg Play on used", "Avg Powerup Used", "Rv Slot % (unique)",
-    "Total RV Revenue / User", "Total Ad Revenue / User", "IAP Revenue / User", "ARPPU",
-    "Lvl complete % (1st Attempt)", "Lvl complete % (2nd Attempt)", "Lvl complete % (3+ Attempt)",
-    "Coin Sink", "Unq Users level start", "Unq Users level complete"
-]
-
-df = df[cols]
-
-for col in df.columns:
-    if df[col].dtype == "object":
-        if df[col].astype(str).str.contains(r'[%$,]').any():
-            cleaned = (
-                df[col].astype(str)
-                .str.replace(r'[$,%]', '', regex=True)
-                .str.replace(',', '', regex=True)
-            )
-            df[col] = pd.to_numeric(cleaned, errors="coerce")
-
-df["Avg Coin Sink"] = round(df["Coin Sink"]/df["Unq Users level start"], 2)
+from utils.correlation_cube import build_correlation_cube, range_correlation
+from utils.level_data import (
+    LEVEL_COLUMN, SNAPSHOT_COLUMN, compare_snapshots, list_partitions,
+    load_level_details, load_level_snapshot, load_level_snapshots,
+)
+from utils.level_outliers import OUTLIER_METHODS, flagged_levels, score_outliers
+from utils.trendlines import best_fit, filter_frame, fit_trendlines
 
 st.title("Level Analysis")
 
@@ -48,11 +23,28 @@ section = st.sidebar.radio(
         "Exploration",
         "Correlations",
         "Outlier Levels",
-        "Level Clustering"
+        "Level Clustering",
+        "Snapshot Comparison"
     ]
 )
 
-level_col = "Event Data Level Sequence In Catalog"
+# snapshots from the partitioned level store when it has any, else the single export
+partitions = list_partitions()
+selected_dates = []
+if partitions:
+    game = st.sidebar.selectbox("Game", list(partitions))
+    dates = partitions[game]
+    if len(dates) > 1:
+        start_date, end_date = st.sidebar.select_slider("Snapshot dates", options=dates, value=(dates[0], dates[-1]))
+    else:
+        start_date = end_date = dates[0]
+    selected_dates = [d for d in dates if start_date <= d <= end_date]
+    snapshot_date = st.sidebar.selectbox("Snapshot to analyze", selected_dates[::-1])
+    df = load_level_snapshot(game, snapshot_date)
+else:
+    df = load_level_details()
+
+level_col = LEVEL_COLUMN
 all_columns = df.columns.tolist()
 numeric_columns = [c for c in df.columns if df[c].dtype in ["int64", "float64"]]
 
@@ -86,15 +78,8 @@ elif section == "Exploration":
     chart_type = st.radio("Chart type", ["Scatter", "Line"], index=0)
     trendline_type = st.radio("Add Regression Trendline", ["None", "Linear", "Curve (auto)"], index=0)
 
-    dff = df[(df[filter_col] >= slider_vals[0]) & (df[filter_col] <= slider_vals[1])]
-
-    if remove_x_outliers:
-        lower, upper = dff[xcol].quantile(0.01), dff[xcol].quantile(0.99)
-        dff = dff[(dff[xcol] >= lower) & (dff[xcol] <= upper)]
-
-    if remove_y_outliers:
-        lower, upper = dff[ycol].quantile(0.01), dff[ycol].quantile(0.99)
-        dff = dff[(dff[ycol] >= lower) & (dff[ycol] <= upper)]
+    trim_cols = tuple(c for c, remove in [(xcol, remove_x_outliers), (ycol, remove_y_outliers)] if remove)
+    dff = filter_frame(df, filter_col, slider_vals, trim_cols)
 
     if sort_x:
         dff = dff.sort_values(xcol)
@@ -107,43 +92,22 @@ elif section == "Exploration":
         fig = px.line(dff_line, x=xcol, y=ycol, markers=True)
         fig.update_traces(line=dict(color="royalblue", width=2))
 
+    trend = None
     if trendline_type != "None" and len(dff) > 2:
-        X = np.array(dff[xcol]).reshape(-1, 1)
-        y = np.array(dff[ycol])
-
-        best_degree = 1
-        best_r2 = -1
-        best_pred = None
-
-        lin_model = LinearRegression().fit(X, y)
-        X_sorted = np.linspace(X.min(), X.max(), 200).reshape(-1, 1)
-        y_lin_pred = lin_model.predict(X_sorted)
-        r2_lin = r2_score(y, lin_model.predict(X))
-        best_degree, best_r2, best_pred = 1, r2_lin, (X_sorted.ravel(), y_lin_pred)
-
-        if trendline_type == "Curve (auto)":
-            for degree in [2, 3]:
-                poly = PolynomialFeatures(degree=degree)
-                X_poly = poly.fit_transform(X)
-                poly_model = LinearRegression().fit(X_poly, y)
-                y_poly_pred = poly_model.predict(X_poly)
-                r2_poly = r2_score(y, y_poly_pred)
-
-                if r2_poly > best_r2:
-                    X_sorted = np.linspace(X.min(), X.max(), 200).reshape(-1, 1)
-                    best_pred = (X_sorted.ravel(), poly_model.predict(poly.transform(X_sorted)))
-                    best_degree, best_r2 = degree, r2_poly
-
-        y_pred = best_pred[1]
-        y_std = np.std(y - np.interp(X.ravel(), best_pred[0], y_pred))
-        y_upper = y_pred + y_std
-        y_lower = y_pred - y_std
-
-        fig.add_scatter(x=best_pred[0], y=y_pred, mode="lines",
+        trend = fit_trendlines(df, xcol, ycol, filter_col, tuple(slider_vals), trim_cols)
+
+    if trend is not None:
+        best_degree = best_fit(trend, (1,) if trendline_type == "Linear" else (1, 2, 3))
+        best = trend["fits"][best_degree]
+        x_grid, y_pred = trend["grid"], best["pred"]
+        y_upper = y_pred + best["std"]
+        y_lower = y_pred - best["std"]
+
+        fig.add_scatter(x=x_grid, y=y_pred, mode="lines",
                         line=dict(color="firebrick", width=3),
-                        name=f"Best fit (deg {best_degree}, R²={best_r2:.2f})")
+                        name=f"Best fit (deg {best_degree}, R²={best['r2']:.2f})")
 
-        fig.add_scatter(x=np.concatenate([best_pred[0], best_pred[0][::-1]]),
+        fig.add_scatter(x=np.concatenate([x_grid, x_grid[::-1]]),
                         y=np.concatenate([y_upper, y_lower[::-1]]),
                         fill="toself",
                         fillcolor="rgba(255,0,0,0.2)",
@@ -184,69 +148,83 @@ elif section == "Correlations":
     min_level, max_level = int(df[level_col].min()), int(df[level_col].max())
     level_range = st.slider("Select Level Range", min_level, max_level, (min_level, max_level))
 
-    df_corr = df[(df[level_col] >= level_range[0]) & (df[level_col] <= level_range[1])]
     numeric_cols_corr = [c for c in numeric_columns if c != level_col]
-    corr = df_corr[numeric_cols_corr].corr()
+    cube = build_correlation_cube(df, level_col, tuple(numeric_cols_corr))
+    corr = range_correlation(cube, *level_range)
 
     threshold = st.slider("Correlation Threshold", 0.0, 1.0, 0.6, 0.05)
     mask = (corr.abs() >= threshold) & (corr != 1.0)
     filtered_corr = corr.where(mask)
     mask_upper = np.triu(np.ones_like(filtered_corr, dtype=bool))
 
-    fig, ax = plt.subplots(figsize=(12, 10))
-    sns.heatmap(
-        filtered_corr,
-        mask=mask_upper,
-        cmap="coolwarm",
-        center=0,
-        annot=True,
-        fmt=".2f",
-        linewidths=0.5,
-        cbar_kws={"shrink": 0.7},
-        ax=ax
+    fig = px.imshow(
+        filtered_corr.where(~mask_upper),
+        text_auto=".2f",
+        color_continuous_scale="RdBu_r",
+        zmin=-1,
+        zmax=1,
+        aspect="auto",
+        title=f"Correlation Heatmap (Levels {level_range[0]} – {level_range[1]}, Threshold |r| ≥ {threshold:.2f})"
     )
-    ax.set_title(f"Correlation Heatmap (Levels {level_range[0]} – {level_range[1]}, Threshold |r| ≥ {threshold:.2f})")
-    st.pyplot(fig)
+    fig.update_layout(height=800)
+    st.plotly_chart(fig, use_container_width=True)
 
 elif section == "Outlier Levels":
     st.header("Outlier Levels")
     outlier_candidates = [c for c in numeric_columns if c != level_col]
-    outlier_metric = st.selectbox("Select metric for outlier detection", outlier_candidates)
-    method = st.radio("Detection Method", ["Z-Score", "IQR (Percentiles)"], index=0)
-    df_out = df.copy()
-
-    if method == "Z-Score":
-        mean_val = df_out[outlier_metric].mean()
-        std_val = df_out[outlier_metric].std()
-        df_out["zscore"] = (df_out[outlier_metric] - mean_val) / std_val
-        outliers = df_out[abs(df_out["zscore"]) > 3]
-        st.write(f"Outliers detected: {len(outliers)} levels")
-    elif method == "IQR (Percentiles)":
-        Q1 = df_out[outlier_metric].quantile(0.15)
-        Q3 = df_out[outlier_metric].quantile(0.85)
-        IQR = Q3 - Q1
-        lower, upper = Q1 - 1.5*IQR, Q3 + 1.5*IQR
-        outliers = df_out[(df_out[outlier_metric] < lower) | (df_out[outlier_metric] > upper)]
+    method = st.radio("Detection Method", list(OUTLIER_METHODS), index=0)
+    flags = score_outliers(df, tuple(outlier_candidates))[method]
+    view = st.radio("View", ["Single metric", "Across metrics"], index=0, horizontal=True)
+
+    if view == "Single metric":
+        outlier_metric = st.selectbox("Select metric for outlier detection", outlier_candidates)
+        outliers = df[flags[outlier_metric]]
         st.write(f"Outliers detected: {len(outliers)} levels")
 
-    if not outliers.empty:
-        fig_out = px.scatter(
-            df_out,
-            x=level_col, y=outlier_metric,
-            opacity=0.6,
-            title=f"Outlier Detection on {outlier_metric}"
-        )
-        fig_out.add_scatter(
-            x=outliers[level_col], y=outliers[outlier_metric],
-            mode="markers",
-            marker=dict(color="red", size=10, symbol="x"),
-            name="Outliers"
-        )
-        st.plotly_chart(fig_out, use_container_width=True)
-        st.subheader("Outlier Levels")
-        st.dataframe(outliers[[level_col, outlier_metric]].sort_values(outlier_metric))
+        if not outliers.empty:
+            fig_out = px.scatter(
+                df,
+                x=level_col, y=outlier_metric,
+                opacity=0.6,
+                title=f"Outlier Detection on {outlier_metric}"
+            )
+            fig_out.add_scatter(
+                x=outliers[level_col], y=outliers[outlier_metric],
+                mode="markers",
+                marker=dict(color="red", size=10, symbol="x"),
+                name="Outliers"
+            )
+            st.plotly_chart(fig_out, use_container_width=True)
+            st.subheader("Outlier Levels")
+            st.dataframe(outliers[[level_col, outlier_metric]].sort_values(outlier_metric))
+        else:
+            st.info("✅ No strong outliers detected.")
     else:
-        st.info("✅ No strong outliers detected.")
+        min_metrics = st.slider("Flagged on at least N metrics", 1, len(outlier_candidates), 2)
+        flagged = flagged_levels(df, flags, level_col, min_metrics)
+        st.write(f"Levels flagged on {min_metrics}+ metrics: {len(flagged)}")
+
+        per_metric = flags.sum().sort_values(ascending=False).rename("Levels Flagged").reset_index()
+        per_metric.columns = ["Metric", "Levels Flagged"]
+        fig_metrics = px.bar(per_metric, x="Metric", y="Levels Flagged", title=f"Outlier Levels per Metric ({method})")
+        st.plotly_chart(fig_metrics, use_container_width=True)
+
+        if not flagged.empty:
+            fig_levels = px.bar(
+                flagged, x=level_col, y="Metrics Flagged",
+                hover_data=["Flagged Metrics"],
+                title=f"Levels Flagged on {min_metrics}+ Metrics"
+            )
+            st.plotly_chart(fig_levels, use_container_width=True)
+            st.dataframe(flagged)
+            st.download_button(
+                "Download flagged levels (CSV)",
+                flagged.to_csv(index=False),
+                file_name="flagged_levels.csv",
+                mime="text/csv"
+            )
+        else:
+            st.info("✅ No levels flagged on that many metrics.")
 
 elif section == "Level Clustering":
     st.header("Level Clustering")
@@ -282,3 +260,31 @@ elif section == "Level Clustering":
         st.plotly_chart(fig_seq, use_container_width=True)
     else:
         st.info("Please select at least 2 features for clustering.")
+
+elif section == "Snapshot Comparison":
+    st.header("Snapshot Comparison")
+
+    if len(selected_dates) < 2:
+        st.info("Pick a game and a date range with at least two snapshots in the level store to compare them.")
+    else:
+        snapshots = load_level_snapshots(game, selected_dates)
+        metric = st.selectbox("Select metric", [c for c in numeric_columns if c != level_col])
+
+        fig_snap = px.line(
+            snapshots.sort_values(level_col),
+            x=level_col, y=metric, color=SNAPSHOT_COLUMN,
+            title=f"{metric} per level across snapshots"
+        )
+        st.plotly_chart(fig_snap, use_container_width=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            base_date = st.selectbox("Base snapshot", selected_dates, index=0)
+        with col2:
+            target_date = st.selectbox("Compare with", selected_dates, index=len(selected_dates) - 1)
+
+        if base_date == target_date:
+            st.info("Choose two different snapshots.")
+        else:
+            st.subheader(f"Largest changes {base_date} → {target_date}")
+            st.dataframe(compare_snapshots(snapshots, metric, base_date, target_date))
@@ -1,36 +1,31 @@
 import pandas as pd
 import json
+import os
+import shutil
 from tqdm import tqdm
 import random
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.nested_json import EMBEDDED_PATHS, NestedJSONDecoder, loads as _loads
 
 tqdm.pandas()
 
 
 class AdditionalDataParser:
-    def __init__(self, df, json_column="Adj Event Data", sample_frac=0.05):
-        self.df = df.copy()
+    def __init__(self, df=None, json_column="Adj Event Data", sample_frac=0.05, copy=True, embedded_paths=None):
+        # df may be omitted when only streaming from a file with stream_to_parquet
+        self.df = df.copy() if copy and df is not None else df
         self.json_column = json_column
         self.sample_frac = sample_frac
         self._parsed_column = "Parsed Event Data"
         self._flat_column = "Flat Dict"
+        self.decoder = NestedJSONDecoder(EMBEDDED_PATHS if embedded_paths is None else embedded_paths, strip_strings=True)
 
     def deep_json_parse(self, data):
-        if isinstance(data, str):
-            data = data.strip()
-            if (data.startswith("{") and data.endswith("}")) or (data.startswith("[") and data.endswith("]")):
-                try:
-                    parsed = json.loads(data)
-                    return self.deep_json_parse(parsed)
-                except json.JSONDecodeError:
-                    return data
-            return data
-        elif isinstance(data, dict):
-            return {key: self.deep_json_parse(value) for key, value in data.items()}
-        elif isinstance(data, list):
-            return [self.deep_json_parse(item) for item in data]
-        else:
-            return data
+        return self.decoder.decode(data)
 
     def flatten_json(self, y):
         out = {}
@@ -49,14 +44,219 @@ class AdditionalDataParser:
         flatten(y)
         return out
 
-    def parse_and_flatten(self):
+    def parse_and_flatten(self, workers=1, shard_size=20_000):
+        if workers > 1:
+            self._parse_parallel(workers, shard_size)
+            return
+
         print("🔄 Parsing and flattening JSON...")
-        self.df[self._parsed_column] = self.df[self.json_column].progress_apply(lambda raw: self.deep_json_parse(json.loads(raw)))
+        self.df[self._parsed_column] = self.df[self.json_column].progress_apply(lambda raw: self.deep_json_parse(_loads(raw)))
         self.df[self._flat_column] = self.df[self._parsed_column].apply(self.flatten_json)
-        flat_df = self.df[self._flat_column].apply(pd.Series)
+        flat_df = self.build_columns(self.df[self._flat_column].tolist(), index=self.df.index)
         self.df = pd.concat([self.df.drop(columns=[self._flat_column, self._parsed_column]), flat_df], axis=1)
         print("✅ Done flattening.")
 
+    def _parse_parallel(self, workers, shard_size):
+        """
+        Splits the rows into shards of `shard_size`, parses and flattens them in a pool
+        of `workers` processes and concatenates the column batches in row order, so the
+        result does not depend on which worker finishes first. Workers decode with this
+        parser's embedded paths and their decoder counts are merged back into its stats.
+        """
+        print(f"🔄 Parsing and flattening JSON with {workers} workers...")
+        raw = self.df[self.json_column]
+        embedded_paths = tuple(self.decoder.embedded_paths)
+        shards = [
+            (raw.iloc[start:start + shard_size].tolist(), raw.index[start:start + shard_size], embedded_paths)
+            for start in range(0, len(raw), shard_size)
+        ]
+        frames = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for frame, summary in tqdm(pool.map(_parse_shard, shards), total=len(shards), unit="shard"):
+                frames.append(frame)
+                self.decoder.merge(summary)
+
+        flat_df = pd.concat(frames) if frames else pd.DataFrame(index=self.df.index)
+        self.df = pd.concat([self.df, flat_df], axis=1)
+        print("✅ Done flattening.")
+
+    @staticmethod
+    def build_columns(flat_rows, index=None):
+        """
+        Builds the wide frame from flattened dicts one column at a time. The first pass
+        collects the union of keys and the value types seen under each; the second fills
+        one preallocated array per key (int64, float64, bool or object) in place.
+        """
+        n = len(flat_rows)
+        types = {}
+        counts = {}
+        for row in flat_rows:
+            for key, value in row.items():
+                seen = types.get(key)
+                if seen is None:
+                    types[key] = seen = set()
+                    counts[key] = 0
+                seen.add(type(value))
+                counts[key] += 1
+
+        columns = {}
+        for key, seen in types.items():
+            complete = counts[key] == n and type(None) not in seen
+            values = seen - {type(None)}
+            if complete and values == {bool}:
+                columns[key] = np.empty(n, dtype=bool)
+            elif complete and values == {int}:
+                columns[key] = np.empty(n, dtype=np.int64)
+            elif values and values <= {int, float}:
+                columns[key] = np.full(n, np.nan)
+            else:
+                columns[key] = np.full(n, np.nan, dtype=object)
+
+        for i, row in enumerate(flat_rows):
+            for key, value in row.items():
+                column = columns[key]
+                if value is None and column.dtype != object:
+                    continue
+                try:
+                    column[i] = value
+                except OverflowError:
+                    # ints beyond 64 bits fall back to a Python object column
+                    columns[key] = column = column.astype(object)
+                    column[i] = value
+
+        return pd.DataFrame(columns, index=index, copy=False)
+
+    def _flatten_chunk(self, chunk):
+        flat = chunk[self.json_column].map(lambda raw: self.flatten_json(self.deep_json_parse(_loads(raw))))
+        flat_df = self.build_columns(flat.tolist(), index=chunk.index)
+        return pd.concat([chunk, flat_df], axis=1)
+
+    @staticmethod
+    def _arrow_ready(frame):
+        # nested lists/dicts and mixed-type columns can't be typed by arrow, store them as text
+        for col in frame.columns[frame.dtypes == object]:
+            kind = pd.api.types.infer_dtype(frame[col], skipna=True)
+            if kind == "mixed-integer-float":
+                frame[col] = frame[col].astype(float)
+            elif kind not in ("string", "bytes", "boolean", "integer", "floating", "empty"):
+                frame[col] = frame[col].map(
+                    lambda v: v if v is None or v is np.nan else
+                    json.dumps(v) if isinstance(v, (list, dict)) else str(v)
+                )
+        return frame
+
+    @staticmethod
+    def _conform(table, schema, safe=True):
+        if not set(table.column_names) <= set(schema.names):
+            return None
+        arrays = []
+        for field in schema:
+            if field.name not in table.column_names:
+                arrays.append(pa.nulls(table.num_rows, field.type))
+                continue
+            column = table[field.name]
+            if column.type != field.type:
+                try:
+                    column = column.cast(field.type, safe=safe)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                    return None
+            arrays.append(column)
+        return pa.Table.from_arrays(arrays, schema=schema)
+
+    @staticmethod
+    def _unified_schema(schemas):
+        # every column in order of first appearance; a column whose type differs between
+        # parts is promoted where arrow can (int64 -> double, null -> anything), else text
+        types = {}
+        for schema in schemas:
+            for field in schema:
+                types.setdefault(field.name, []).append(field.type)
+        fields = []
+        for name, kinds in types.items():
+            try:
+                unified = pa.unify_schemas([pa.schema([(name, kind)]) for kind in kinds], promote_options="permissive")
+                fields.append(unified.field(name))
+            except (pa.ArrowTypeError, pa.ArrowInvalid):
+                fields.append(pa.field(name, pa.string()))
+        return pa.schema(fields)
+
+    @classmethod
+    def _rewrite_part(cls, path, schema):
+        # one row group at a time, so memory stays at the streaming chunk size; the unified
+        # schema only widens types, so an unsafe cast (e.g. a huge int64 to double) is intended
+        tmp_path = f"{path}.tmp"
+        with pq.ParquetFile(path) as source, pq.ParquetWriter(tmp_path, schema) as writer:
+            for i in range(source.num_row_groups):
+                table = cls._conform(source.read_row_group(i), schema, safe=False)
+                if table is None:
+                    raise ValueError(f"{path} does not fit the unified schema")
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    def stream_to_parquet(self, csv_path, out_dir, chunksize=50_000, **read_csv_kwargs):
+        """
+        Parses and flattens `csv_path` one chunk at a time and writes the result to
+        Parquet, so peak memory follows `chunksize` instead of the size of the export.
+        Chunks are appended as row groups to the current part file; a chunk that adds
+        new keys or changes a column's type starts the next part-NNNNN.parquet.
+
+        When that happens the earlier parts are rewritten to the final, unified schema
+        at the end (absent columns as nulls), since dataset readers take one file's
+        schema and would silently drop columns only later parts have. The schema is
+        also written to _common_metadata.
+
+        Everything is written to a temporary directory that replaces `out_dir` at the
+        end, so parts left by an earlier run never mix with this one.
+        """
+        print(f"🔄 Streaming {csv_path} → {out_dir} in chunks of {chunksize} rows...")
+        tmp_dir = f"{out_dir.rstrip(os.sep)}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        writer = None
+        part = 0
+        rows = 0
+        schemas = []
+
+        for chunk in tqdm(pd.read_csv(csv_path, chunksize=chunksize, **read_csv_kwargs), unit="chunk"):
+            flat = self._arrow_ready(self._flatten_chunk(chunk))
+            table = pa.Table.from_pandas(flat, preserve_index=False)
+
+            if writer is not None:
+                conformed = self._conform(table, writer.schema)
+                if conformed is None:
+                    writer.close()
+                    writer = None
+                    part += 1
+                else:
+                    table = conformed
+
+            if writer is None:
+                writer = pq.ParquetWriter(os.path.join(tmp_dir, f"part-{part:05d}.parquet"), table.schema)
+                schemas.append(writer.schema)
+            writer.write_table(table)
+            rows += table.num_rows
+
+        if writer is not None:
+            writer.close()
+            schema = self._unified_schema(schemas)
+            for i, part_schema in enumerate(schemas):
+                if not part_schema.equals(schema):
+                    self._rewrite_part(os.path.join(tmp_dir, f"part-{i:05d}.parquet"), schema)
+            pq.write_metadata(schema, os.path.join(tmp_dir, "_common_metadata"))
+
+        self._swap_dir(tmp_dir, out_dir)
+        print(f"✅ Wrote {rows} rows to {len(schemas)} Parquet file(s).")
+
+    @staticmethod
+    def _swap_dir(new_dir, final_dir):
+        old_dir = None
+        if os.path.isdir(final_dir):
+            old_dir = f"{new_dir}.old"
+            os.replace(final_dir, old_dir)
+        os.replace(new_dir, final_dir)
+        if old_dir is not None:
+            shutil.rmtree(old_dir, ignore_errors=True)
+
     def compare_flattened_with_original(self, flat_row, original_parsed_json):
         issues = []
 
@@ -79,14 +279,100 @@ class AdditionalDataParser:
         recurse(original_parsed_json)
         return issues
 
-    def run_sanity_check(self):
+    @staticmethod
+    def _leaves(parsed):
+        # (key, value) for every non-null value of the decoded JSON, named the way the
+        # flattened columns should be: dotted dict keys, lists whole and per element
+        stack = [("", parsed)]
+        while stack:
+            path, node = stack.pop()
+            if isinstance(node, dict):
+                stack.extend((f"{path}{k}.", v) for k, v in node.items())
+            elif isinstance(node, list):
+                yield path[:-1], node
+                stack.extend((f"{path}{i}.", v) for i, v in enumerate(node))
+            elif node is not None:
+                yield path[:-1], node
+
+    @staticmethod
+    def _differs(expected, actual):
+        # a bool stored as 0/1 (or the reverse) is a typing error, not an equal value
+        is_bool = pd.api.types.is_bool_dtype
+        if (pd.api.types.is_numeric_dtype(expected) and pd.api.types.is_numeric_dtype(actual)
+                and is_bool(expected) == is_bool(actual)):
+            return (expected.to_numpy() != actual.to_numpy())
+
+        def same(a, b):
+            if isinstance(a, (bool, np.bool_)) != isinstance(b, (bool, np.bool_)):
+                return False
+            try:
+                return bool(a == b)
+            except ValueError:
+                return False
+
+        return np.fromiter((not same(a, b) for a, b in zip(expected, actual)), dtype=bool, count=len(expected))
+
+    def sanity_report(self, sample_frac=None):
+        """
+        Checks the flattened frame against the decoded JSON for a sample of rows
+        (sample_frac=1.0 checks every row). The expected values come from walking the
+        nested JSON, not from flatten_json/build_columns, and are compared one key at
+        a time. Returns one row per key: rows expecting a value, rows missing it in
+        the frame, rows holding a different value and rows holding a value that
+        shouldn't be there.
+        """
+        frac = self.sample_frac if sample_frac is None else sample_frac
+        sample = self.df if frac >= 1 else self.df.sample(frac=frac, random_state=42)
+
+        expected = {}
+        for position, raw in enumerate(sample[self.json_column]):
+            for key, value in self._leaves(self.deep_json_parse(_loads(raw))):
+                positions, values = expected.setdefault(key, ([], []))
+                positions.append(position)
+                values.append(value)
+
+        report = {}
+        for key, (positions, values) in expected.items():
+            positions = np.asarray(positions)
+            if key not in self.df.columns:
+                report[key] = (len(positions), len(positions), 0, 0)
+                continue
+
+            got = self.df.loc[sample.index, key]
+            got_present = got.notna().to_numpy()
+            want_present = np.zeros(len(sample), dtype=bool)
+            want_present[positions] = True
+            found = got_present[positions]
+
+            want = pd.Series(values)[found].reset_index(drop=True)
+            mismatched = self._differs(want, got.iloc[positions[found]].reset_index(drop=True))
+            report[key] = (
+                len(positions),
+                (~found).sum(),
+                mismatched.sum(),
+                (~want_present & got_present).sum(),
+            )
+
+        report = pd.DataFrame.from_dict(
+            report, orient="index", columns=["expected", "missing", "mismatched", "unexpected"]
+        )
+        report.index.name = "key"
+        return report.sort_values(["missing", "mismatched", "unexpected"], ascending=False)
+
+    def run_sanity_check(self, batch=False):
+        if batch:
+            report = self.sanity_report()
+            failing = report[report[["missing", "mismatched", "unexpected"]].sum(axis=1) > 0]
+            print(f"\n🧪 Checked {len(report)} keys on {int(self.sample_frac * 100)}% of rows, {len(failing)} with issues.")
+            return report
+
         print(f"\n🧪 Running sanity check on {int(self.sample_frac * 100)}% of rows...")
         sample = self.df.sample(frac=self.sample_frac, random_state=42)
         pass_count = 0
 
         for idx in sample.index:
             raw = self.df.loc[idx, self.json_column]
-            parsed = self.deep_json_parse(json.loads(raw))
+            parsed = self.deep_json_parse(_loads(raw))
             flattened = self.flatten_json(parsed)
             mismatches = self.compare_flattened_with_original(flattened, parsed)
             if mismatches:
@@ -102,3 +388,9 @@ class AdditionalDataParser:
     def get_df(self):
         return self.df
 
+
+def _parse_shard(shard):
+    raw_values, index, embedded_paths = shard
+    parser = AdditionalDataParser(embedded_paths=embedded_paths)
+    rows = [parser.flatten_json(parser.deep_json_parse(_loads(raw))) for raw in raw_values]
+    return parser.build_columns(rows, index=index), parser.decoder.summary()
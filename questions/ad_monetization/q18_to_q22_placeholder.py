@@ -1,4 +1,16 @@
 import streamlit as st
+
+CATEGORY = "💸 Ad Monetization"
+QUESTIONS = {
+    18: "Placeholder",
+    19: "Placeholder",
+    20: "Placeholder",
+    21: "Placeholder",
+    22: "Placeholder",
+}
+PRELOAD = ()
+
+
 def render():
     st.title("Ad Monetization Q18–Q22")
     st.info("Placeholder for Q18 to Q22")
\ No newline at end of file
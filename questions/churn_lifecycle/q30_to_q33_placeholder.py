@@ -1,4 +1,15 @@
 import streamlit as st
+
+CATEGORY = "📉 Churn & Lifecycle"
+QUESTIONS = {
+    30: "Placeholder",
+    31: "Placeholder",
+    32: "Placeholder",
+    33: "Placeholder",
+}
+PRELOAD = ()
+
+
 def render():
     st.title("Churn Lifecycle Q30–Q33")
     st.info("Placeholder for Q30 to Q33")
\ No newline at end of file
@@ -1,4 +1,16 @@
 import streamlit as st
+
+CATEGORY = "🔍 Cohort & Funnel"
+QUESTIONS = {
+    43: "Placeholder",
+    44: "Placeholder",
+    45: "Placeholder",
+    46: "Placeholder",
+    47: "Placeholder",
+}
+PRELOAD = ()
+
+
 def render():
     st.title("Cohort Funnel Q43–Q47")
     st.info("Placeholder for Q43 to Q47")
\ No newline at end of file
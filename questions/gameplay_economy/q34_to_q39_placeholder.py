@@ -1,4 +1,17 @@
 import streamlit as st
+
+CATEGORY = "🎮 Gameplay"
+QUESTIONS = {
+    34: "Placeholder",
+    35: "Placeholder",
+    36: "Placeholder",
+    37: "Placeholder",
+    38: "Placeholder",
+    39: "Placeholder",
+}
+PRELOAD = ()
+
+
 def render():
     st.title("Gameplay Economy Q34–Q39")
     st.info("Placeholder for Q34 to Q39")
\ No newline at end of file
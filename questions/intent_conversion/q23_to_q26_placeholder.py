@@ -1,4 +1,15 @@
 import streamlit as st
+
+CATEGORY = "🧪 Purchase Intent"
+QUESTIONS = {
+    23: "Placeholder",
+    24: "Placeholder",
+    25: "Placeholder",
+    26: "Placeholder",
+}
+PRELOAD = ()
+
+
 def render():
     st.title("Intent Conversion Q23–Q26")
     st.info("Placeholder for Q23 to Q26")
\ No newline at end of file
@@ -1,4 +1,14 @@
 import streamlit as st
+
+CATEGORY = "📐 Predictive Modeling"
+QUESTIONS = {
+    40: "Placeholder",
+    41: "Placeholder",
+    42: "Placeholder",
+}
+PRELOAD = ()
+
+
 def render():
     st.title("Predictive Q40–Q42")
     st.info("Placeholder for Q40 to Q42")
\ No newline at end of file
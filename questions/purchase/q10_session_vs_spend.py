@@ -1,40 +1,33 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-from utils.data_loader import load_main_data
+from utils.compute_cache import memoize
+from utils.trimming import trim_quantiles
+from utils.user_facts import FACT_COLUMNS, build_user_facts
 
-def render():
-    st.title("How do session counts relate to total IAP spend?")
+CATEGORY = "🎯 Purchase Behavior"
+QUESTIONS = {10: "How do session counts relate to total IAP spend?"}
+PRELOAD = ("altair",)
 
-    df = load_main_data()
+COLUMNS = FACT_COLUMNS
 
-    df_q10 = df.dropna(subset=[
-        "user_data.user_id",
-        "adjust_post_events_iap.adj_session_count",
-        "adjust_post_events_iap.adj_converted_usd_value_dimension"
-    ])
+@memoize
+def compute_session_spend(df):
+    user_iap = (
+        build_user_facts(df)
+        .dropna(subset=["max_session"])[["max_session", "session_spend"]]
+        .rename(columns={"max_session": "final_session", "session_spend": "total_spend"})   # max = final session
+    )
+    user_iap["final_session"] = user_iap["final_session"].astype(int)
 
-    df_q10["session_count"] = df_q10["adjust_post_events_iap.adj_session_count"].astype(int)
-    df_q10["revenue"] = df_q10["adjust_post_events_iap.adj_converted_usd_value_dimension"].astype(float)
+    # extreme outliers (1st–99th percentile)
+    df_trimmed = trim_quantiles(user_iap, ["final_session", "total_spend"], 0.01, 0.99).reset_index()
+    return df_trimmed
 
-    user_iap = df_q10.groupby("user_data.user_id").agg({
-        "session_count": "max",        # max = final session
-        "revenue": "sum"               # total IAP spend
-    }).rename(columns={
-        "session_count": "final_session",
-        "revenue": "total_spend"
-    })
+def render(df):
+    st.title("How do session counts relate to total IAP spend?")
 
-    # extreme outliers (1st–99th percentile)
-    session_bounds = user_iap["final_session"].quantile([0.01, 0.99])
-    spend_bounds = user_iap["total_spend"].quantile([0.01, 0.99])
-
-    df_trimmed = user_iap[
-        (user_iap["final_session"] >= session_bounds.iloc[0]) &
-        (user_iap["final_session"] <= session_bounds.iloc[1]) &
-        (user_iap["total_spend"] >= spend_bounds.iloc[0]) &
-        (user_iap["total_spend"] <= spend_bounds.iloc[1])
-    ].reset_index()
+    df_trimmed = compute_session_spend(df)
 
     st.markdown("This chart shows the relationship between total session count and in-app spend at the user level, excluding extreme outliers.")
 
@@ -1,16 +1,27 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-from utils.data_loader import load_main_data
+from utils.compute_cache import memoize
 
-def render():
-    df = load_main_data()
+CATEGORY = "🎯 Purchase Behavior"
+QUESTIONS = {1: "At which user levels do purchases occur?"}
+PRELOAD = ("altair",)
+
+COLUMNS = {
+    "adjust_post_events_iap.user_level_linear": "float64",
+}
+
+@memoize
+def compute_level_counts(df):
+    return df['adjust_post_events_iap.user_level_linear'].value_counts()
+
+def render(df):
     st.title("At what levels do most purchases occur?")
 
     top_n = st.slider("Level Slider", min_value=5, max_value=50, value=30)
     metric = st.radio("Choose metric:", ["Percentage", "Count"])
 
-    counts = df['adjust_post_events_iap.user_level_linear'].value_counts()
+    counts = compute_level_counts(df)
     if metric == "Percentage":
         data = round((counts / counts.sum()) * 100, 2)
     else:
@@ -1,12 +1,20 @@
 import streamlit as st
 import pandas as pd
-from utils.data_loader import load_main_data
+from utils.compute_cache import memoize
 
-def render():
-    st.title("Time between install and first purchase")
-    
-    df = load_main_data()
+CATEGORY = "🎯 Purchase Behavior"
+QUESTIONS = {2: "Time between install and first purchase?"}
+PRELOAD = ()
+
+COLUMNS = {
+    "user_data.user_id": "string",
+    "install_timestamp": "string",
+    "adjust_post_events_iap.adj_event_timestamp_time": "string",
+    "adjust_post_events_iap.adj_session_count": "float64",
+}
 
+@memoize
+def compute_first_purchases(df):
     df_q2 = df.dropna(subset=[
         "user_data.user_id",
         "install_timestamp",
@@ -28,6 +36,12 @@ def render():
         .dt.total_seconds() / 3600
     )
     first_purchases["session_gap"] = first_purchases["adjust_post_events_iap.adj_session_count"]
+    return first_purchases
+
+def render(df):
+    st.title("Time between install and first purchase")
+
+    first_purchases = compute_first_purchases(df)
 
     time_percentiles = first_purchases["hours_to_first_purchase"].quantile([0.25, 0.5, 0.75])
     session_percentiles = first_purchases["session_gap"].quantile([0.25, 0.5, 0.75])
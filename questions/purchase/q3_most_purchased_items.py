@@ -1,13 +1,19 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-from utils.data_loader import load_main_data
+from utils.compute_cache import memoize
 
-def render():
-    st.title("What are the most purchased items and their revenue contribution?")
+CATEGORY = "🎯 Purchase Behavior"
+QUESTIONS = {3: "What are the most purchased items?"}
+PRELOAD = ("altair",)
 
-    df = load_main_data()
+COLUMNS = {
+    "adjust_post_events_iap.adj_product_id": "string",
+    "adjust_post_events_iap.adj_converted_usd_value_dimension": "float64",
+}
 
+@memoize
+def compute_product_summary(df):
     df_q3 = df.dropna(subset=[
         "adjust_post_events_iap.adj_product_id",
         "adjust_post_events_iap.adj_converted_usd_value_dimension"
@@ -29,10 +35,15 @@ def render():
         "purchase_pct": purchase_pct,
         "revenue_pct": revenue_pct
     }).fillna(0).sort_values("revenue_pct", ascending=False)
+    q3_summary.index.name = "product_id"
+    return q3_summary
 
+def render(df):
+    st.title("What are the most purchased items and their revenue contribution?")
+
+    q3_summary = compute_product_summary(df)
 
     top_n = st.slider("Top N products to display", 5, 15, 10)
-    q3_summary.index.name = "product_id"
     q3_summary_top = q3_summary.head(top_n).reset_index()
 
     melted = q3_summary_top.melt(id_vars="product_id", value_vars=["purchase_pct", "revenue_pct"],
@@ -1,18 +1,30 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-from utils.data_loader import load_main_data
+from utils.compute_cache import memoize
 
-def render():
-    st.title("Top Countries Among Purchasers")
+CATEGORY = "🎯 Purchase Behavior"
+QUESTIONS = {4: "What are the top countries among purchasers?"}
+PRELOAD = ("altair",)
+
+COLUMNS = {
+    "adjust_post_events_iap.adj_country": "string",
+}
 
-    df = load_main_data()
+@memoize
+def compute_country_share(df):
     df_q4 = df.dropna(subset=["adjust_post_events_iap.adj_country"])
 
     country_pct = round((
         df_q4["adjust_post_events_iap.adj_country"]
         .value_counts(normalize=True) * 100
     ), 2)
+    return country_pct
+
+def render(df):
+    st.title("Top Countries Among Purchasers")
+
+    country_pct = compute_country_share(df)
 
     top_n = st.slider("Top N countries to display", 5, 30, 10)
     country_df = country_pct.head(top_n).reset_index()
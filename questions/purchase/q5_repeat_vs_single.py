@@ -1,36 +1,35 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-from utils.data_loader import load_main_data
+from utils.binning import bin_labels
+from utils.compute_cache import memoize
+from utils.user_facts import FACT_COLUMNS, build_user_facts
 
-def render():
-    st.title("How many users make just one purchase vs. repeat purchases?")
+CATEGORY = "🎯 Purchase Behavior"
+QUESTIONS = {5: "How many users make just one purchase vs. repeat purchases?"}
+PRELOAD = ("altair",)
+
+COLUMNS = FACT_COLUMNS
 
-    df = load_main_data()
-
-    purchase_counts = df["user_data.user_id"].value_counts()
-
-    def bucket(n):
-        if n == 1:
-            return "1"
-        elif 2 <= n <= 5:
-            return "2–5"
-        elif 6 <= n <= 10:
-            return "6–10"
-        elif 11 <= n <= 15:
-            return "11–15"
-        elif 16 <= n <= 20:
-            return "16–20"
-        elif 21 <= n <= 30:
-            return "21–30"
-        else:
-            return "30+"
-
-    buckets = purchase_counts.map(bucket)
+@memoize
+def compute_bucket_distribution(df):
+    purchase_counts = build_user_facts(df)["event_count"]
+
+    buckets = bin_labels(
+        purchase_counts,
+        edges=[0, 1, 5, 10, 15, 20, 30, float("inf")],
+        labels=["1", "2–5", "6–10", "11–15", "16–20", "21–30", "30+"]
+    )
     bucket_dist = round(buckets.value_counts(normalize=True) * 100, 2)
     bucket_df = bucket_dist.reset_index()
     bucket_df.columns = ["Bucket", "Percentage"]
     bucket_df = bucket_df.sort_values("Bucket")
+    return bucket_df
+
+def render(df):
+    st.title("How many users make just one purchase vs. repeat purchases?")
+
+    bucket_df = compute_bucket_distribution(df)
 
     chart = alt.Chart(bucket_df).mark_bar().encode(
         x=alt.X("Bucket:N", title="Purchase Count Bucket"),
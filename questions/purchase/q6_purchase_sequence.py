@@ -1,13 +1,21 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-from utils.data_loader import load_main_data
+from utils.binning import bin_labels
+from utils.compute_cache import memoize
 
-def render():
-    st.title("How does the sequence of purchases evolve?")
+CATEGORY = "🎯 Purchase Behavior"
+QUESTIONS = {6: "How does the sequence of purchases evolve?"}
+PRELOAD = ("altair",)
 
-    df = load_main_data()
+COLUMNS = {
+    "user_data.user_id": "string",
+    "adjust_post_events_iap.adj_purchase_order": "float64",
+    "adjust_post_events_iap.adj_converted_usd_value_dimension": "float64",
+}
 
+@memoize
+def compute_price_band_mix(df):
     df_q6 = df.dropna(subset=[
         "user_data.user_id",
         "adjust_post_events_iap.adj_purchase_order",
@@ -17,22 +25,22 @@ def render():
     df_q6["purchase_order"] = df_q6["adjust_post_events_iap.adj_purchase_order"].astype(int)
     df_q6["usd_value"] = df_q6["adjust_post_events_iap.adj_converted_usd_value_dimension"].astype(float)
 
-    def price_band(x):
-        if x <= 2:
-            return "$0–2"
-        elif x <= 5:
-            return "$2–5"
-        elif x <= 10:
-            return "$5–10"
-        else:
-            return "$10+"
-
     df_q6b = df_q6[df_q6["purchase_order"] <= 50].copy()
-    df_q6b["price_band"] = df_q6b["usd_value"].map(price_band)
+    df_q6b["price_band"] = bin_labels(
+        df_q6b["usd_value"],
+        edges=[-float("inf"), 2, 5, 10, float("inf")],
+        labels=["$0–2", "$2–5", "$5–10", "$10+"]
+    )
 
     band_counts = df_q6b.groupby(["purchase_order", "price_band"]).size().unstack(fill_value=0)
     band_percentages = round(band_counts.div(band_counts.sum(axis=1), axis=0) * 100, 2)
     band_percentages = band_percentages.reset_index().melt(id_vars="purchase_order", var_name="Price Band", value_name="Percentage")
+    return band_percentages
+
+def render(df):
+    st.title("How does the sequence of purchases evolve?")
+
+    band_percentages = compute_price_band_mix(df)
 
     chart = alt.Chart(band_percentages).mark_area().encode(
         x=alt.X("purchase_order:Q", title="Purchase Order"),
@@ -1,39 +1,32 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-from utils.data_loader import load_main_data
+from utils.binning import bin_labels
+from utils.compute_cache import memoize
+from utils.user_facts import FACT_COLUMNS, build_user_facts
 
-def render():
-    st.title("What’s the average purchase frequency per user type?")
-
-    df = load_main_data()
+CATEGORY = "🎯 Purchase Behavior"
+QUESTIONS = {7: "What’s the average purchase frequency per user type?"}
+PRELOAD = ("altair",)
 
-    df_q7 = df.dropna(subset=[
-        "user_data.user_id",
-        "lifetime_status_lifetime_level_completed",
-        "adjust_post_events_iap.adj_converted_usd_value_dimension"
-    ])
-    df_q7["revenue"] = df_q7["adjust_post_events_iap.adj_converted_usd_value_dimension"].astype(float)
+COLUMNS = FACT_COLUMNS
 
-    user_summary = df_q7.groupby("user_data.user_id").agg({
-        "lifetime_status_lifetime_level_completed": "first",
-        "adjust_post_events_iap.adj_purchase_order": "count",
-        "revenue": "sum"
-    }).rename(columns={
-        "lifetime_status_lifetime_level_completed": "levels_completed",
-        "adjust_post_events_iap.adj_purchase_order": "purchase_count",
-        "revenue": "total_revenue"
+@memoize
+def compute_type_summary(df):
+    facts = build_user_facts(df)
+    user_summary = facts.dropna(subset=["levels_completed"])[
+        ["levels_completed", "ordered_purchases", "levelled_spend"]
+    ].rename(columns={
+        "ordered_purchases": "purchase_count",
+        "levelled_spend": "total_revenue"
     })
+    user_summary["purchase_count"] = user_summary["purchase_count"].astype(int)
 
-    def tag_user_type(x):
-        if x <= 50:
-            return "Casual"
-        elif x <= 200:
-            return "Midcore"
-        else:
-            return "Hardcore"
-
-    user_summary["user_type"] = user_summary["levels_completed"].map(tag_user_type)
+    user_summary["user_type"] = bin_labels(
+        user_summary["levels_completed"],
+        edges=[-float("inf"), 50, 200, float("inf")],
+        labels=["Casual", "Midcore", "Hardcore"]
+    )
 
     type_summary = round(user_summary.groupby("user_type").agg(
         user_count=("purchase_count", "count"),
@@ -44,6 +37,12 @@ def render():
     type_summary["user_pct"] = round(type_summary["user_count"] / type_summary["user_count"].sum() * 100, 2)
     type_summary["revenue_pct"] = round(type_summary["total_revenue"] / type_summary["total_revenue"].sum() * 100, 2)
     type_summary = type_summary.reset_index()
+    return type_summary, user_summary
+
+def render(df):
+    st.title("What’s the average purchase frequency per user type?")
+
+    type_summary, user_summary = compute_type_summary(df)
 
     st.subheader("Summary by User Type")
     st.dataframe(type_summary.style.format({
@@ -2,13 +2,22 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import altair as alt
-from utils.data_loader import load_main_data
+from utils.binning import select_labels
+from utils.compute_cache import memoize
+from utils.trimming import quantile_mask
 
-def render():
-    st.title("Do high-value purchases happen at higher levels or earlier in the lifecycle?")
+CATEGORY = "🎯 Purchase Behavior"
+QUESTIONS = {8: "Do high-value purchases happen at higher levels or earlier in the lifecycle?"}
+PRELOAD = ("altair",)
 
-    df = load_main_data()
+COLUMNS = {
+    "adjust_post_events_iap.user_level_linear": "float64",
+    "adjust_post_events_iap.adj_converted_usd_value_dimension": "float64",
+    "adjust_post_events_iap.adj_session_count": "float64",
+}
 
+@memoize
+def compute_value_band_distributions(df):
     df_q8 = df.dropna(subset=[
         "adjust_post_events_iap.user_level_linear",
         "adjust_post_events_iap.adj_converted_usd_value_dimension",
@@ -18,18 +27,14 @@ def render():
     df_q8["user_level"] = df_q8["adjust_post_events_iap.user_level_linear"].astype(int)
     df_q8["session_count"] = df_q8["adjust_post_events_iap.adj_session_count"].astype(int)
     df_q8["usd_value"] = df_q8["adjust_post_events_iap.adj_converted_usd_value_dimension"].astype(float)
-    df_q8["value_band"] = df_q8["usd_value"].apply(lambda x: "High ($10+)" if x >= 10 else "Low (<$10)")
+    df_q8["value_band"] = select_labels([df_q8["usd_value"] >= 10], ["High ($10+)"], default="Low (<$10)")
 
     # trim outliers (5th–95th percentile)
-    level_bounds = df_q8["user_level"].quantile([0.05, 0.95])
-    session_bounds = df_q8["session_count"].quantile([0.05, 0.95])
+    mask, bounds = quantile_mask(df_q8, ["user_level", "session_count"], 0.05, 0.95)
+    level_bounds = bounds["user_level"]
+    session_bounds = bounds["session_count"]
 
-    df_q8_trimmed = df_q8[
-        (df_q8["user_level"] >= level_bounds.iloc[0]) &
-        (df_q8["user_level"] <= level_bounds.iloc[1]) &
-        (df_q8["session_count"] >= session_bounds.iloc[0]) &
-        (df_q8["session_count"] <= session_bounds.iloc[1])
-    ]
+    df_q8_trimmed = df_q8[mask]
 
     level_bins = np.linspace(level_bounds.iloc[0], level_bounds.iloc[1], 50)
     level_dist = []
@@ -62,6 +67,12 @@ def render():
         session_dist.append(temp)
 
     df_session_plot = pd.concat(session_dist)
+    return df_level_plot, df_session_plot, df_q8_trimmed[["user_level", "session_count", "usd_value", "value_band"]]
+
+def render(df):
+    st.title("Do high-value purchases happen at higher levels or earlier in the lifecycle?")
+
+    df_level_plot, df_session_plot, df_q8_trimmed = compute_value_band_distributions(df)
 
     st.subheader("User Level at Purchase")
     chart1 = alt.Chart(df_level_plot).mark_line(point=True).encode(
@@ -90,4 +101,4 @@ def render():
     st.altair_chart(chart2, use_container_width=True)
 
     with st.expander("Show trimmed (extreme outliers removed) data sample"):
-        st.dataframe(df_q8_trimmed[["user_level", "session_count", "usd_value", "value_band"]].sample(10))
+        st.dataframe(df_q8_trimmed.sample(10))
@@ -5,23 +5,20 @@ from sklearn.cluster import KMeans
 import plotly.express as px
 import altair as alt
 
-from utils.data_loader import load_main_data
+from utils.compute_cache import memoize
+from utils.user_facts import FACT_COLUMNS, build_user_facts
 
+CATEGORY = "👤 Segmentation"
+QUESTIONS = {11: "Can users be clustered based on spending patterns?"}
+PRELOAD = ("sklearn.cluster", "sklearn.preprocessing", "plotly.express", "altair")
 
-def render():
-    st.title("Q11: Spend-Based User Clusters")
+COLUMNS = FACT_COLUMNS
 
-    df = load_main_data()
 
+@memoize
+def compute_spend_clusters(df):
     # Compute spend features
-    df_q11 = (
-        df.groupby("user_data.user_id")
-          .agg(
-              total_spend=("adjust_post_events_iap.adj_converted_usd_value_dimension", "sum"),
-              purchase_count=("adjust_post_events_iap.adj_converted_usd_value_dimension", "count")
-          )
-          .reset_index()
-    )
+    df_q11 = build_user_facts(df)[["total_spend", "purchase_count"]].reset_index()
     df_q11["avg_purchase_value"] = df_q11["total_spend"] / df_q11["purchase_count"]
 
     # Filter high-volume purchasers
@@ -44,6 +41,13 @@ def render():
         cluster_means.index[2]: "Whale"
     }
     df_q11_filtered["segment"] = df_q11_filtered["cluster"].map(cluster_map)
+    return df_q11_filtered
+
+
+def render(df):
+    st.title("Q11: Spend-Based User Clusters")
+
+    df_q11_filtered = compute_spend_clusters(df)
 
     st.subheader("📊 2D Cluster Scatter")
     chart = alt.Chart(df_q11_filtered).mark_circle(size=60, opacity=0.7).encode(
@@ -2,30 +2,32 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 
-from utils.data_loader import load_main_data
+from utils.binning import combo_labels
+from utils.compute_cache import memoize
 
+CATEGORY = "👤 Segmentation"
+QUESTIONS = {12: "Are certain player personas more monetizable?"}
+PRELOAD = ("plotly.express",)
+
+COLUMNS = {
+    "user_data.user_id": "string",
+    "lifetime_status_lifetime_hammer_used": "float64",
+    "lifetime_status_lifetime_replace_used": "float64",
+    "lifetime_status_lifetime_refresh_used": "float64",
+    "lifetime_status_lifetime_revive_used": "float64",
+    "lifetime_status_lifetime_level_failed": "float64",
+    "lifetime_status_lifetime_level_completed": "float64",
+    "lifetime_status_lifetime_attempts": "float64",
+    "lifetime_status_lifetime_rv_watched": "float64",
+    "session_count": "float64",
+    "time_in_app": "float64",
+    "lifetime_spend_iap": "float64",
+}
 
-def render():
-    st.title("Q12: Persona-based Spend Analysis")
 
-    df = load_main_data()
-
-    q12_cols = [
-        "user_data.user_id",
-        "lifetime_status_lifetime_hammer_used",
-        "lifetime_status_lifetime_replace_used",
-        "lifetime_status_lifetime_refresh_used",
-        "lifetime_status_lifetime_revive_used",
-        "lifetime_status_lifetime_level_failed",
-        "lifetime_status_lifetime_level_completed",
-        "lifetime_status_lifetime_attempts",
-        "lifetime_status_lifetime_rv_watched",
-        "session_count",
-        "time_in_app",
-        "lifetime_spend_iap"
-    ]
-
-    df_q12 = df[q12_cols].dropna()
+@memoize
+def compute_persona_spend(df):
+    df_q12 = df[list(COLUMNS)].dropna()
 
     # Persona tagging
     df_q12["revive_heavy"] = df_q12["lifetime_status_lifetime_revive_used"] > 20
@@ -40,15 +42,10 @@ def render():
         (df_q12["time_in_app"] > 1_000_000)
     )
 
-    def label_persona(row):
-        tags = []
-        if row["revive_heavy"]: tags.append("Revive")
-        if row["booster_heavy"]: tags.append("Booster")
-        if row["failure_reliant"]: tags.append("Failure")
-        if row["engaged_heavy"]: tags.append("Engaged")
-        return "+".join(tags) if tags else "None"
-
-    df_q12["persona_combo"] = df_q12.apply(label_persona, axis=1)
+    df_q12["persona_combo"] = combo_labels(
+        [df_q12["revive_heavy"], df_q12["booster_heavy"], df_q12["failure_reliant"], df_q12["engaged_heavy"]],
+        ["Revive", "Booster", "Failure", "Engaged"]
+    )
 
     # Average spend per persona combo
     combo_avg = (
@@ -58,6 +55,13 @@ def render():
         .rename(columns={"lifetime_spend_iap": "avg_spend"})
     )
     combo_avg["avg_spend"] = combo_avg["avg_spend"].round(2)
+    return combo_avg, df_q12[["user_data.user_id", "persona_combo", "lifetime_spend_iap"]]
+
+
+def render(df):
+    st.title("Q12: Persona-based Spend Analysis")
+
+    combo_avg, personas = compute_persona_spend(df)
 
     st.subheader("🌳 Treemap of Avg Spend by Persona Combination")
 
@@ -80,4 +84,4 @@ def render():
     st.plotly_chart(fig)
 
     with st.expander("📄 View Raw Persona Data"):
-        st.dataframe(df_q12[["user_data.user_id", "persona_combo", "lifetime_spend_iap"]])
+        st.dataframe(personas)
@@ -2,28 +2,30 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 
-from utils.data_loader import load_main_data
+from utils.compute_cache import memoize
+from utils.trimming import trim_quantiles
 
+CATEGORY = "👤 Segmentation"
+QUESTIONS = {13: "How Do Engagement Profiles Relate to Spend?"}
+PRELOAD = ("altair",)
 
-def render():
-    st.title("Q13: Engagement vs Spend Correlation")
-
-    df = load_main_data()
+COLUMNS = {
+    "user_data.user_id": "string",
+    "session_count": "float64",
+    "time_in_app": "float64",
+    "lifetime_status_lifetime_attempts": "float64",
+    "lifetime_status_lifetime_level_completed": "float64",
+    "lifetime_status_lifetime_stack_velocity": "float64",
+    "lifetime_status_lifetime_stacks_placed": "float64",
+    "lifetime_status_lifetime_highest_stack_size": "float64",
+    "lifetime_status_meta_completed": "float64",
+    "lifetime_spend_iap": "float64",
+}
 
-    q13_cols = [
-        "user_data.user_id",
-        "session_count",
-        "time_in_app",
-        "lifetime_status_lifetime_attempts",
-        "lifetime_status_lifetime_level_completed",
-        "lifetime_status_lifetime_stack_velocity",
-        "lifetime_status_lifetime_stacks_placed",
-        "lifetime_status_lifetime_highest_stack_size",
-        "lifetime_status_meta_completed",
-        "lifetime_spend_iap"
-    ]
 
-    df_q13 = df[q13_cols].dropna()
+@memoize
+def compute_spend_correlation(df):
+    df_q13 = df[list(COLUMNS)].dropna()
 
     # Outlier filtering (1st–99th percentile)
     engagement_cols = [
@@ -32,13 +34,7 @@ def render():
         "lifetime_status_lifetime_stacks_placed", "lifetime_status_meta_completed"
     ]
 
-    df_q13_filtered = df_q13.copy()
-    for col in engagement_cols + ["lifetime_spend_iap"]:
-        q_low = df_q13[col].quantile(0.01)
-        q_high = df_q13[col].quantile(0.99)
-        df_q13_filtered = df_q13_filtered[
-            (df_q13_filtered[col] >= q_low) & (df_q13_filtered[col] <= q_high)
-        ]
+    df_q13_filtered = trim_quantiles(df_q13, engagement_cols + ["lifetime_spend_iap"], 0.01, 0.99)
 
     # Compute correlation
     corr = df_q13_filtered.drop(columns=["user_data.user_id"]).corr()
@@ -47,6 +43,13 @@ def render():
     corr_target["correlation_pct"] = (corr_target["correlation"] * 100).round(1)
     corr_target = corr_target.sort_values("correlation", ascending=False).reset_index()
     corr_target.rename(columns={"index": "metric"}, inplace=True)
+    return corr_target, df_q13_filtered
+
+
+def render(df):
+    st.title("Q13: Engagement vs Spend Correlation")
+
+    corr_target, df_q13_filtered = compute_spend_correlation(df)
 
     st.subheader("📊 Engagement Metrics Correlation with Spend")
 
@@ -2,23 +2,26 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-from scipy.stats import percentileofscore
 
-from utils.data_loader import load_main_data
+from utils.compute_cache import memoize
+from utils.percentiles import build_percentile_index, percentile_frame
 
+CATEGORY = "👤 Segmentation"
+QUESTIONS = {14: "Which lifetime status metrics best differentiate high-payers from low-payers?"}
+PRELOAD = ("plotly.graph_objects",)
 
-def render():
-    st.title("Q14: Engagement Profiles by Spend Tier")
+engagement_cols = [
+    "session_count", "time_in_app", "lifetime_status_lifetime_attempts",
+    "lifetime_status_lifetime_level_completed", "lifetime_status_lifetime_stack_velocity",
+    "lifetime_status_lifetime_stacks_placed", "lifetime_status_lifetime_highest_stack_size",
+    "lifetime_status_meta_completed"
+]
 
-    df = load_main_data()
+COLUMNS = {col: "float64" for col in engagement_cols + ["lifetime_spend_iap"]}
 
-    engagement_cols = [
-        "session_count", "time_in_app", "lifetime_status_lifetime_attempts",
-        "lifetime_status_lifetime_level_completed", "lifetime_status_lifetime_stack_velocity",
-        "lifetime_status_lifetime_stacks_placed", "lifetime_status_lifetime_highest_stack_size",
-        "lifetime_status_meta_completed"
-    ]
 
+@memoize
+def compute_tier_percentiles(df):
     df_q14 = df[engagement_cols + ["lifetime_spend_iap"]].dropna()
 
     # Define spend tiers
@@ -38,14 +41,16 @@ def render():
     )
 
     # Normalize using global percentiles
-    normalized_v2 = pd.DataFrame(index=mean_stats_v2.index, columns=engagement_cols)
-    for col in engagement_cols:
-        global_dist = df_q14[col].dropna()
-        for tier in mean_stats_v2.index:
-            val = mean_stats_v2.loc[tier, col]
-            normalized_v2.loc[tier, col] = percentileofscore(global_dist, val)
-
-    normalized_v2 = normalized_v2.reindex(["Low", "Medium", "High"])
+    percentile_index = build_percentile_index(df, tuple(engagement_cols), subset=tuple(COLUMNS))
+    normalized_v2 = percentile_frame(percentile_index, mean_stats_v2)
+
+    return normalized_v2.reindex(["Low", "Medium", "High"])
+
+
+def render(df):
+    st.title("Q14: Engagement Profiles by Spend Tier")
+
+    normalized_v2 = compute_tier_percentiles(df)
 
     # Radar chart
     categories = engagement_cols + [engagement_cols[0]]  # loop to start
@@ -1,4 +1,14 @@
 import streamlit as st
+
+CATEGORY = "⏳ Timing & Sessions"
+QUESTIONS = {
+    27: "Placeholder",
+    28: "Placeholder",
+    29: "Placeholder",
+}
+PRELOAD = ()
+
+
 def render():
     st.title("Timing Session Q27–Q29")
     st.info("Placeholder for Q27 to Q29")
\ No newline at end of file
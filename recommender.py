@@ -0,0 +1,247 @@
+from cachetools import TTLCache
+from prometheus_client import CollectorRegistry, Counter, Histogram, generate_latest, multiprocess
+from pythonjsonlogger.json import JsonFormatter
+import atexit
+import collections
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+
+from utils.nested_json import NestedJSONDecoder
+
+LOG_LEVEL = os.environ.get("ANALYZE_LOG_LEVEL", "INFO")
+SKU_CACHE_SIZE = int(os.environ.get("ANALYZE_SKU_CACHE_SIZE", 100_000))
+SKU_CACHE_TTL = float(os.environ.get("ANALYZE_SKU_CACHE_TTL", 3600))
+DEFAULT_SKU = "com.gamebrain.hexasort.tinyhexpack"
+# set by the process manager when several workers share one /metrics view
+PROMETHEUS_MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+REQUEST_SECONDS = Histogram(
+    "analyze_request_seconds", "End-to-end request latency.", ["endpoint"],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5),
+)
+REQUESTS = Counter("analyze_requests", "Requests handled.", ["endpoint", "status"])
+PHASE_SECONDS = Histogram(
+    "analyze_phase_seconds", "Time spent in each step of a recommendation.", ["phase"],
+    buckets=(.00005, .0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25),
+)
+PAYLOAD_BYTES = Histogram(
+    "analyze_payload_bytes", "Request body size.", ["endpoint"],
+    buckets=tuple(2 ** i for i in range(8, 27, 2)),
+)
+PURCHASE_RECORDS = Histogram(
+    "analyze_purchase_records", "IAPRecordBook.Records length per user payload.",
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+SKU_CACHE = Counter("analyze_sku_cache", "Per-user SKU tally lookups (hit, extended or miss).", ["result"])
+
+DECODE_SECONDS = PHASE_SECONDS.labels("decode")
+PARSE_SECONDS = PHASE_SECONDS.labels("parse_json_strings")
+TOP_SKU_SECONDS = PHASE_SECONDS.labels("find_top_valid_sku")
+
+decoder = NestedJSONDecoder()
+logger = logging.getLogger("analyze")
+_log_listener = None
+_log_pid = None
+
+
+def start_logging():
+    """
+    Sends the analyze logger through a queue so request threads never block on I/O.
+    A single listener thread formats records as JSON lines and writes them to stderr.
+
+    Call it in each serving process after any fork: a forked child inherits the
+    queue but not the listener thread, so its records would pile up unwritten.
+    A listener inherited that way is replaced.
+    """
+    global _log_listener, _log_pid
+    if _log_listener is not None and _log_pid == os.getpid():
+        return
+
+    for handler in [h for h in logger.handlers if isinstance(h, logging.handlers.QueueHandler)]:
+        logger.removeHandler(handler)
+
+    log_queue = queue.SimpleQueue()
+    stream = logging.StreamHandler()
+    stream.setFormatter(JsonFormatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    _log_listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _log_listener.start()
+    _log_pid = os.getpid()
+
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+
+def stop_logging():
+    # flushes queued records; called on worker exit
+    global _log_listener
+    if _log_listener is not None and _log_pid == os.getpid():
+        _log_listener.stop()
+    _log_listener = None
+
+
+atexit.register(stop_logging)
+
+# second row shop items
+valid_skus = [
+    "com.gamebrain.hexasort.tinyhexpack",
+    "com.gamebrain.hexasort.minihexpack",
+    "com.gamebrain.hexasort.hexvaultpack",
+    "com.gamebrain.hexasort.grandhexpack",
+    "com.gamebrain.hexasort.megahexpack",
+]
+VALID_SKU_INDEX = {sku: i for i, sku in enumerate(valid_skus)}
+
+_sku_cache = TTLCache(maxsize=SKU_CACHE_SIZE, ttl=SKU_CACHE_TTL)
+_sku_cache_lock = threading.Lock()
+
+
+def parse_json_strings(obj):
+    """
+    Recursively parses any string fields that are actually JSON objects or arrays.
+    Works for dicts and lists.
+    """
+    return decoder.decode(obj)
+
+class SkuTally:
+    """
+    Running purchase counts per valid SKU over a user's records, in record order.
+    Ties go to the SKU seen first, the same as Counter.most_common.
+
+    A cached tally is matched to the next request by the record count and the
+    first and last records, which is constant-time whatever the history length.
+    Appends, refunds or removals that change the count, and rewritten histories
+    whose first or last record differs, are recounted. An edit in the middle
+    that keeps all three is not detected, and is served until the entry expires.
+    """
+
+    __slots__ = ("counts", "first_seen", "size", "ends")
+
+    def __init__(self, sku_count):
+        self.counts = [0] * sku_count
+        self.first_seen = [0] * sku_count
+        self.size = 0
+        self.ends = None
+
+    def copy(self):
+        other = SkuTally(0)
+        other.counts = self.counts.copy()
+        other.first_seen = self.first_seen.copy()
+        other.size = self.size
+        other.ends = self.ends
+        return other
+
+    def matches_prefix(self, records):
+        if self.size > len(records):
+            return False
+        return self.size == 0 or _ends_fingerprint(records, self.size) == self.ends
+
+    def extend(self, records, sku_index):
+        counts, first_seen = self.counts, self.first_seen
+        for position in range(self.size, len(records)):
+            i = sku_index.get(records[position].get("SkuId"))
+            if i is not None:
+                if not counts[i]:
+                    first_seen[i] = position
+                counts[i] += 1
+        if len(records) > self.size:
+            self.size = len(records)
+            self.ends = _ends_fingerprint(records, self.size)
+        return self
+
+    def top(self, skus):
+        best = None
+        for i, count in enumerate(self.counts):
+            if count and (best is None or (count, -self.first_seen[i]) > (self.counts[best], -self.first_seen[best])):
+                best = i
+        return DEFAULT_SKU if best is None else skus[best]
+
+
+def _record_fingerprint(record):
+    return hash(tuple(sorted((key, repr(value)) for key, value in record.items())))
+
+
+def _ends_fingerprint(records, size):
+    return _record_fingerprint(records[0]), _record_fingerprint(records[size - 1])
+
+
+def find_top_valid_sku(purchase_records, valid_skus):
+    filtered_skus = [record["SkuId"] for record in purchase_records if record.get("SkuId") in valid_skus]
+    if not filtered_skus:
+        return DEFAULT_SKU
+    return collections.Counter(filtered_skus).most_common(1)[0][0]
+
+
+def top_sku_for_user(user_id, purchase_records):
+    """
+    find_top_valid_sku with a per-user TTL cache. When the records extend the ones
+    seen on the user's last call, only the new records are counted. Payloads whose
+    UserId is missing or not a plain string/int bypass the cache.
+    """
+    if not isinstance(user_id, (str, int)):
+        SKU_CACHE.labels("miss").inc()
+        return find_top_valid_sku(purchase_records, VALID_SKU_INDEX)
+
+    with _sku_cache_lock:
+        cached = _sku_cache.get(user_id)
+
+    if cached is not None and cached.matches_prefix(purchase_records):
+        if cached.size == len(purchase_records):
+            SKU_CACHE.labels("hit").inc()
+            return cached.top(valid_skus)
+        SKU_CACHE.labels("extended").inc()
+        tally = cached.copy()
+    else:
+        SKU_CACHE.labels("miss").inc()
+        tally = SkuTally(len(valid_skus))
+    tally.extend(purchase_records, VALID_SKU_INDEX)
+
+    with _sku_cache_lock:
+        _sku_cache[user_id] = tally
+    return tally.top(valid_skus)
+
+
+def recommend(data):
+    """
+    Shop recommendation for one user payload. Shared by the Flask and Tornado servers.
+    """
+    started = time.perf_counter()
+    parsed_data = parse_json_strings(data)
+    parsed = time.perf_counter()
+    PARSE_SECONDS.observe(parsed - started)
+
+    user_id = parsed_data.get("UserId")
+    user_state = parsed_data.get("UserState")
+    user_analytics = parsed_data.get("Analytics")
+    user_purchases = parsed_data.get("IAPRecords", {})
+
+    all_purchase_records = user_purchases.get("IAPRecordBook", {}).get("Records", [])
+    shop_item = top_sku_for_user(user_id, all_purchase_records)
+    TOP_SKU_SECONDS.observe(time.perf_counter() - parsed)
+    PURCHASE_RECORDS.observe(len(all_purchase_records))
+
+    if not all_purchase_records:
+        result = [shop_item]
+    elif len(all_purchase_records) == 1:
+        result = [shop_item]
+    else:
+        logger.info("multiple purchases", extra={"user_id": user_id, "purchases": len(all_purchase_records)})
+        result = [shop_item]
+
+    return result
+
+
+def metrics_payload():
+    """
+    Prometheus exposition for /metrics. Under a multi-process server the samples
+    of every worker are merged from PROMETHEUS_MULTIPROC_DIR.
+    """
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest()
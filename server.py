@@ -1,83 +1,103 @@
-from collections import Counter
-from flask import Flask, request, jsonify
+from flask import Flask, Response, abort, g, request, jsonify
+from prometheus_client import CONTENT_TYPE_LATEST
 import json
+import os
+import time
 
+from recommender import (
+    DECODE_SECONDS, PAYLOAD_BYTES, REQUEST_SECONDS, REQUESTS,
+    find_top_valid_sku, metrics_payload, parse_json_strings, recommend, start_logging, stop_logging, valid_skus,
+)
+from utils.nested_json import loads
+
+MAX_CONTENT_LENGTH = int(os.environ.get("ANALYZE_MAX_CONTENT_LENGTH", 1024 * 1024))
+BATCH_MAX_CONTENT_LENGTH = int(os.environ.get("ANALYZE_BATCH_MAX_CONTENT_LENGTH", 64 * 1024 * 1024))
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/jsonl")
 
 app = Flask(__name__)
+app.config["MAX_CONTENT_LENGTH"] = MAX_CONTENT_LENGTH
+# gunicorn imports the app in each worker; with preload_app its post_fork hook restarts this
+start_logging()
+
+
+@app.before_request
+def _start_timer():
+    g.started = time.perf_counter()
+
+
+@app.after_request
+def _record_request(response):
+    endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    if endpoint != "/metrics":
+        REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - g.started)
+        REQUESTS.labels(endpoint, response.status_code).inc()
+    return response
+
+
+def _read_batch():
+    # NDJSON is read line by line from the stream; anything else must be one JSON array
+    if request.mimetype in NDJSON_MIMETYPES:
+        payloads = []
+        size = 0
+        for line_no, line in enumerate(request.stream, start=1):
+            size += len(line)
+            if not line.strip():
+                continue
+            try:
+                with DECODE_SECONDS.time():
+                    payloads.append(loads(line))
+            except ValueError:
+                abort(400, description=f"Line {line_no} is not valid JSON.")
+        PAYLOAD_BYTES.labels("/analyze/batch").observe(size)
+        return payloads
+
+    try:
+        body = request.get_data()
+        PAYLOAD_BYTES.labels("/analyze/batch").observe(len(body))
+        with DECODE_SECONDS.time():
+            payloads = loads(body)
+    except ValueError:
+        abort(400, description="Body is not valid JSON.")
+    if not isinstance(payloads, list):
+        abort(400, description="Expected a JSON array of user payloads.")
+    return payloads
+
 
-# second row shop items
-valid_skus = [
-    "com.gamebrain.hexasort.tinyhexpack",
-    "com.gamebrain.hexasort.minihexpack",
-    "com.gamebrain.hexasort.hexvaultpack",
-    "com.gamebrain.hexasort.grandhexpack",
-    "com.gamebrain.hexasort.megahexpack",
-]
+@app.route('/analyze', methods=['POST'])
+def analyze():
+    PAYLOAD_BYTES.labels("/analyze").observe(request.content_length or 0)
+    with DECODE_SECONDS.time():
+        data = request.get_json(force=True)
+    return jsonify(recommend(data))
 
 
-def parse_json_strings(obj):
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
     """
-    Recursively parses any string fields that are actually JSON objects or arrays.
-    Works for dicts and lists.
+    Recommendations for many users in one request, in input order. Accepts a JSON
+    array, or NDJSON (one payload per line) with an NDJSON content type, and answers
+    in the same format.
     """
-    if isinstance(obj, dict):
-        parsed = {}
-        for key, value in obj.items():
-            if isinstance(value, str):
-                try:
-                    value_parsed = json.loads(value)
-                    parsed[key] = parse_json_strings(value_parsed)
-                except json.JSONDecodeError:
-                    parsed[key] = value
-            else:
-                parsed[key] = parse_json_strings(value)
-        return parsed
-
-    elif isinstance(obj, list):
-        return [parse_json_strings(item) for item in obj]
-
-    else:
-        return obj
-
-def find_top_valid_sku(purchase_records, valid_skus):
-    filtered_skus = [record["SkuId"] for record in purchase_records if record.get("SkuId") in valid_skus]
-
-    if not filtered_skus:
-        return "com.gamebrain.hexasort.tinyhexpack"
-
-    sku_counts = Counter(filtered_skus)
-    most_common_sku, _ = sku_counts.most_common(1)[0]
-
-    return most_common_sku
-
-
-
-@app.route('/analyze', methods=['POST'])
-def analyze():
-    data = request.get_json(force=True)
-    parsed_data = parse_json_strings(data)
+    request.max_content_length = BATCH_MAX_CONTENT_LENGTH
+    payloads = _read_batch()
 
-    user_id = parsed_data.get("UserId")
-    user_state = parsed_data.get("UserState")
-    user_analytics = parsed_data.get("Analytics")
-    user_purchases = parsed_data.get("IAPRecords", {})
+    for position, payload in enumerate(payloads):
+        if not isinstance(payload, dict):
+            abort(400, description=f"Payload {position} is not a JSON object.")
+    results = [recommend(payload) for payload in payloads]
 
-    all_purchase_records = user_purchases.get("IAPRecordBook", {}).get("Records", [])
-    shop_item = find_top_valid_sku(all_purchase_records, valid_skus)
+    if request.mimetype in NDJSON_MIMETYPES:
+        body = "".join(json.dumps(result) + "\n" for result in results)
+        return Response(body, mimetype="application/x-ndjson")
+    return jsonify(results)
 
-    if not all_purchase_records:
-        result = [shop_item]
-    elif len(all_purchase_records) == 1:
-        result = [shop_item]
-    else:
-        print("-"*20)
-        print("Total Purchases Made:", len(all_purchase_records))
-        print("-"*20)
-        result = [shop_item]
 
-    return jsonify(result)
+@app.route('/metrics')
+def metrics():
+    return Response(metrics_payload(), mimetype=CONTENT_TYPE_LATEST)
 
 
 if __name__ == "__main__":
+    # development server only; in production run `gunicorn -c gunicorn.conf.py`
     app.run(debug=True, port=5004)
 
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+
+def bin_labels(values, edges, labels, right=True):
+    """
+    Labels each value with the bin it falls into, using pd.cut's interval rules.
+    Returns plain string labels (None where the value is missing or outside the edges).
+    """
+    codes = pd.cut(values, bins=edges, labels=False, right=right)
+    codes = np.asarray(codes, dtype=float)
+    missing = np.isnan(codes)
+
+    out = np.asarray(labels, dtype=object).take(np.where(missing, 0, codes).astype(np.intp))
+    out[missing] = None
+    if isinstance(values, pd.Series):
+        return pd.Series(out, index=values.index, name=values.name)
+    return out
+
+
+def select_labels(conditions, labels, default):
+    """
+    First-match labelling over a list of boolean masks, like an if/elif chain.
+    """
+    conditions = [np.asarray(c, dtype=bool) for c in conditions]
+    return np.select(conditions, np.asarray(labels, dtype=object), default=default)
+
+
+def combo_labels(flags, names, empty="None"):
+    """
+    Joins the names of all set flags with "+" (e.g. "Revive+Engaged").
+    Flags are packed into a bitmask per row and looked up in a table of all
+    2**len(names) combinations, so no per-row Python code runs.
+    """
+    codes = np.zeros(len(flags[0]), dtype=np.int64)
+    for bit, flag in enumerate(flags):
+        codes |= np.asarray(flag, dtype=np.int64) << bit
+
+    table = np.array([
+        "+".join(name for bit, name in enumerate(names) if code >> bit & 1) or empty
+        for code in range(1 << len(names))
+    ], dtype=object)
+    return table[codes]
@@ -0,0 +1,171 @@
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import frame_key
+
+MAX_ENTRIES = 128
+MAX_BYTES = 1024 ** 3
+# second tier shared by all processes, one directory per data and code version; None disables it
+DISK_CACHE_DIR = "./data/cache"
+# results depend on the question modules and on every helper they call
+CODE_DIRS = ("utils", "questions")
+_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+_sizes = {}
+_functions = {}
+
+
+def _nbytes(value):
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(v) for v in value)
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+def _key_part(value):
+    if isinstance(value, pd.DataFrame):
+        return frame_key(value)
+    if isinstance(value, (list, dict)):
+        return repr(value)
+    return value
+
+
+def _evict():
+    total = sum(_sizes.values())
+    while _entries and (len(_entries) > MAX_ENTRIES or total > MAX_BYTES):
+        key, _ = _entries.popitem(last=False)
+        total -= _sizes.pop(key)
+
+
+def _source_digest(func):
+    try:
+        with open(inspect.getsourcefile(func), "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()[:16]
+    except (OSError, TypeError):
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def code_version():
+    """
+    Hash of every .py file under CODE_DIRS, read once per process, so a deploy that
+    changes any question or helper starts a fresh set of disk-cached results.
+    """
+    digest = hashlib.sha256()
+    for code_dir in CODE_DIRS:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(_ROOT_DIR, code_dir)):
+            dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+            for filename in sorted(f for f in filenames if f.endswith(".py")):
+                path = os.path.join(dirpath, filename)
+                digest.update(os.path.relpath(path, _ROOT_DIR).encode())
+                with open(path, "rb") as f:
+                    digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()[:12]
+
+
+def cache_dir(data_version):
+    return os.path.join(DISK_CACHE_DIR, f"{data_version}-{code_version()}")
+
+
+def _disk_path(key, args, source_digest):
+    # only results computed from versioned frames go to disk, so they expire with the data
+    if DISK_CACHE_DIR is None or source_digest is None:
+        return None
+    version = next((a.attrs.get("data_version") for a in args if isinstance(a, pd.DataFrame)), None)
+    if version is None:
+        return None
+    digest = hashlib.sha256(repr((source_digest, key)).encode()).hexdigest()[:32]
+    return os.path.join(cache_dir(version), f"{digest}.pkl")
+
+
+def _disk_load(path):
+    try:
+        with open(path, "rb") as f:
+            return True, pickle.load(f)
+    except Exception:
+        # missing, half-written or from an incompatible library version: recompute
+        return False, None
+
+
+def _disk_store(path, value):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def memoize(func):
+    """
+    Caches a pure compute function in a process-wide LRU shared by all question
+    modules. Frames are keyed by their data version, other arguments by value.
+    Results are shared between reruns and sessions, so callers must not mutate them.
+
+    Results for versioned frames are also pickled under DISK_CACHE_DIR, in a directory
+    per data and code version and keyed by the function's source file too, so other
+    processes (and utils.warmup) share them.
+    """
+    name = f"{func.__module__}.{func.__qualname__}"
+    source_digest = _source_digest(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (
+            name,
+            tuple(_key_part(a) for a in args),
+            tuple(sorted((k, _key_part(v)) for k, v in kwargs.items())),
+        )
+        with _lock:
+            if key in _entries:
+                _entries.move_to_end(key)
+                return _entries[key]
+
+        path = _disk_path(key, args, source_digest)
+        found, result = _disk_load(path) if path else (False, None)
+        if not found:
+            result = func(*args, **kwargs)
+            if path:
+                _disk_store(path, result)
+
+        with _lock:
+            _entries[key] = result
+            _sizes[key] = _nbytes(result)
+            _evict()
+        return result
+
+    _functions[name] = wrapper
+    return wrapper
+
+
+def memoized_functions(module_name):
+    """
+    Memoized functions defined in a module, in definition order.
+    """
+    return [f for f in _functions.values() if f.__module__ == module_name]
+
+
+def clear_cache():
+    with _lock:
+        _entries.clear()
+        _sizes.clear()
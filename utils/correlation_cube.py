@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.data_loader import frame_key
+
+STATS = ("n", "sx", "sxx", "sxy")
+# ranges spanning at most this many levels are summed directly: a prefix difference
+# over a few levels of a large column cancels most of its significant digits
+SHORT_RANGE = 256
+
+
+@st.cache_resource(hash_funcs={pd.DataFrame: frame_key}, show_spinner=False)
+def build_correlation_cube(df, level_col, columns):
+    """
+    Prefix sums over level sequence of the pairwise-complete sufficient statistics
+    of `columns`: for every pair (i, j) the count of rows where both are present,
+    Σx_i and Σx_i² over those rows, and Σx_i·x_j. Rows are aggregated per level
+    first; the per-level slices are kept too, for short ranges.
+
+    Values are centred on their column means before summing; Pearson r is shift
+    invariant and this keeps the one-pass formula from cancelling. The cache is
+    shared without copying, so the arrays are read-only.
+    """
+    columns = list(columns)
+    rows = df[[level_col] + columns].dropna(subset=[level_col])
+    levels, group = np.unique(rows[level_col].to_numpy(dtype=float), return_inverse=True)
+
+    # rows of one level made contiguous, so each level is a single block
+    order = np.argsort(group, kind="stable")
+    bounds = np.searchsorted(group[order], np.arange(len(levels) + 1))
+    values = rows[columns].to_numpy(dtype=float)[order]
+    present = ~np.isnan(values)
+    centred = np.where(present, values - np.nanmean(values, axis=0), 0.0)
+    mask = present.astype(float)
+
+    def per_level(a, b):
+        # Σ over the rows of each level of the outer product a_row ⊗ b_row, one
+        # (columns x columns) product per block instead of one per row
+        out = np.empty((len(levels), len(columns), len(columns)))
+        for i, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+            out[i] = a[start:stop].T @ b[start:stop]
+        return out
+
+    slices = {
+        "n": per_level(mask, mask),
+        "sx": per_level(centred, mask),
+        "sxx": per_level(centred ** 2, mask),
+        "sxy": per_level(centred, centred),
+    }
+    cube = {}
+    for key, stat in slices.items():
+        prefix = np.concatenate([np.zeros((1,) + stat.shape[1:]), np.cumsum(stat, axis=0)])
+        prefix.setflags(write=False)
+        stat.setflags(write=False)
+        cube[key] = prefix
+        cube[f"{key}_level"] = stat
+
+    levels.setflags(write=False)
+    cube["levels"] = levels
+    cube["columns"] = columns
+    return cube
+
+
+def range_correlation(cube, low, high):
+    """
+    Pearson correlation matrix of the rows whose level lies in [low, high], matching
+    DataFrame.corr() (pairwise-complete), from two prefix slices of the cube.
+    """
+    lo = np.searchsorted(cube["levels"], low, side="left")
+    hi = np.searchsorted(cube["levels"], high, side="right")
+    if hi - lo <= SHORT_RANGE:
+        n, sx, sxx, sxy = (cube[f"{key}_level"][lo:hi].sum(axis=0) for key in STATS)
+        magnitude = sxx
+    else:
+        n, sx, sxx, sxy = (cube[key][hi] - cube[key][lo] for key in STATS)
+        magnitude = cube["sxx"][hi]
+
+    sy, syy = sx.T, sxx.T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = n * sxy - sx * sy
+        var_x = n * sxx - sx ** 2
+        var_y = n * syy - sy ** 2
+        corr = cov / np.sqrt(var_x * var_y)
+    # a column that is constant over the range leaves rounding noise rather than an
+    # exact 0, relative to the magnitude of the sums it was computed from
+    scale = n * magnitude
+    flat_x = var_x <= 1e-12 * scale
+    flat_y = var_y <= 1e-12 * scale.T
+    corr[(n < 2) | flat_x | flat_y] = np.nan
+    corr = np.clip(corr, -1.0, 1.0)
+
+    defined = ~np.isnan(np.diag(corr))
+    corr[np.diag_indices_from(corr)] = np.where(defined, 1.0, np.nan)
+    return pd.DataFrame(corr, index=cube["columns"], columns=cube["columns"])
@@ -1,7 +1,177 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import streamlit as st
 
-@st.cache_data
-def load_main_data():
-    df = pd.read_csv("./data/shop_qa_without_json.csv")
-    return df.dropna(subset=["adjust_post_events_iap.user_level_linear"])
\ No newline at end of file
+CSV_PATH = "./data/shop_qa_without_json.csv"
+PARQUET_DIR = "./data/parquet"
+MANIFEST_NAME = "manifest.json"
+BASE_COLUMN = "adjust_post_events_iap.user_level_linear"
+CHUNK_ROWS = 500_000
+
+_convert_lock = threading.Lock()
+# versions this process has already asked utils.warmup about
+_warm_checked = set()
+
+
+def _file_hash(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_manifest(parquet_dir):
+    try:
+        with open(os.path.join(parquet_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(parquet_dir, manifest):
+    path = os.path.join(parquet_dir, MANIFEST_NAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def _arrow_safe(chunk):
+    # object columns holding both numbers and strings can't be typed by arrow
+    for col in chunk.columns[chunk.dtypes == object]:
+        if pd.api.types.infer_dtype(chunk[col], skipna=True).startswith("mixed"):
+            chunk[col] = chunk[col].where(chunk[col].isna(), chunk[col].astype(str))
+    return chunk
+
+
+def convert_to_parquet(csv_path, out_dir, chunk_rows=CHUNK_ROWS):
+    """
+    Writes the CSV export as a directory of Parquet parts, one per chunk of rows.
+    The directory is built under a temporary name and renamed into place when complete.
+    """
+    tmp_dir = f"{out_dir}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    reader = pd.read_csv(csv_path, chunksize=chunk_rows, low_memory=False)
+    for i, chunk in enumerate(reader):
+        table = pa.Table.from_pandas(_arrow_safe(chunk), preserve_index=False)
+        pq.write_table(table, os.path.join(tmp_dir, f"part-{i:05d}.parquet"))
+
+    try:
+        os.replace(tmp_dir, out_dir)
+    except OSError:
+        # another process finished the same version first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def data_version(csv_path=CSV_PATH, parquet_dir=PARQUET_DIR):
+    """
+    Returns the version id of the shop export, converting it to Parquet when it changed.
+    The CSV is only re-hashed when its size or mtime differs from the manifest.
+    """
+    manifest = _read_manifest(parquet_dir)
+    if not os.path.exists(csv_path) and manifest:
+        return _checked_version(manifest["version"])
+
+    stat = os.stat(csv_path)
+    if manifest and manifest["size"] == stat.st_size and manifest["mtime_ns"] == stat.st_mtime_ns:
+        return _checked_version(manifest["version"])
+
+    with _convert_lock:
+        manifest = _read_manifest(parquet_dir)
+        if manifest and manifest["size"] == stat.st_size and manifest["mtime_ns"] == stat.st_mtime_ns:
+            return _checked_version(manifest["version"])
+
+        version = _file_hash(csv_path)[:16]
+        os.makedirs(parquet_dir, exist_ok=True)
+        out_dir = os.path.join(parquet_dir, version)
+        if not os.path.isdir(out_dir):
+            convert_to_parquet(csv_path, out_dir)
+
+        _write_manifest(parquet_dir, {
+            "version": version,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        })
+        return _checked_version(version)
+
+
+def _checked_version(version):
+    # once per process and version, so a deploy with changed code re-warms the current export
+    if version not in _warm_checked:
+        _warm_checked.add(version)
+        _start_warmup(version)
+    return version
+
+
+def _start_warmup(version):
+    # imported here because utils.warmup imports this module
+    from utils.warmup import start_warmup
+    start_warmup(version)
+
+
+def read_parquet_columns(version, columns=None, parquet_dir=PARQUET_DIR):
+    """
+    Reads the requested columns of a converted export, skipping all others on disk.
+    """
+    data_dir = os.path.join(parquet_dir, version)
+    parts = sorted(p for p in os.listdir(data_dir) if p.endswith(".parquet"))
+
+    frames = []
+    for part in parts:
+        path = os.path.join(data_dir, part)
+        if columns is None:
+            table = pq.read_table(path)
+        else:
+            available = set(pq.read_schema(path).names)
+            table = pq.read_table(path, columns=[c for c in columns if c in available])
+        frames.append(table.to_pandas())
+
+    # chunks are typed independently, so let pandas reconcile e.g. float vs object
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+
+# a resource, not cache_data: reruns get the same frame instead of unpickling a copy
+@st.cache_resource(show_spinner="Loading shop data...")
+def _load_main_data(version, columns, dtypes):
+    df = read_parquet_columns(version, columns)
+    df = df.dropna(subset=[BASE_COLUMN])
+    for col, dtype in dtypes:
+        if df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+    df.attrs["data_version"] = version
+    return df
+
+
+def load_main_data(columns=None):
+    """
+    Loads the shop export, optionally projected to a list of columns or to a
+    {column: dtype} mapping such as a question module's COLUMNS manifest.
+    The frame is shared by every session and rerun, so callers must not mutate it.
+    """
+    dtypes = ()
+    if columns is not None:
+        if isinstance(columns, dict):
+            dtypes = tuple(columns.items())
+        columns = tuple(dict.fromkeys([*columns, BASE_COLUMN]))
+    return _load_main_data(data_version(), columns, dtypes)
+
+
+def frame_key(df):
+    """
+    Cheap cache key for frames returned by load_main_data, used as a hash_funcs
+    entry so cached functions don't hash millions of rows on every call.
+    """
+    version = df.attrs.get("data_version")
+    if version is None:
+        return int(pd.util.hash_pandas_object(df).sum())
+    return version, tuple(df.columns), len(df)
@@ -0,0 +1,201 @@
+"""
+Level-details catalogs. A single export can be loaded directly, and many exports
+across games and days are kept in a partitioned Parquet store:
+
+    data/levels/game=<game>/date=<YYYY-MM-DD>/part.parquet
+
+Add an export to the store with:
+
+    python -m utils.level_data ingest level-details.csv --game hexasort --date 2025-08-01
+"""
+import argparse
+import datetime
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+LEVEL_CSV_PATH = "./level-details.csv"
+LEVEL_STORE_DIR = "./data/levels"
+LEVEL_COLUMN = "Event Data Level Sequence In Catalog"
+SNAPSHOT_COLUMN = "Snapshot Date"
+PART_NAME = "part.parquet"
+
+# how each metric is written in the export: "count" uses thousands separators,
+# "percent" and "currency" carry a % or $ sign, "number" is a plain decimal
+LEVEL_SCHEMA = {
+    LEVEL_COLUMN: "count",
+    "Avg Stacks Placed to Complete": "number",
+    "Avg Stacks Placed to Fail": "number",
+    "Level Churn %": "percent",
+    "Level Fail %": "percent",
+    "Retry Ratio": "number",
+    "Unique Level Fail %": "percent",
+    "Avg Play on used": "number",
+    "Avg Powerup Used": "number",
+    "Rv Slot % (unique)": "percent",
+    "Total RV Revenue / User": "currency",
+    "Total Ad Revenue / User": "currency",
+    "IAP Revenue / User": "currency",
+    "ARPPU": "currency",
+    "Lvl complete % (1st Attempt)": "percent",
+    "Lvl complete % (2nd Attempt)": "percent",
+    "Lvl complete % (3+ Attempt)": "percent",
+    "Coin Sink": "count",
+    "Unq Users level start": "count",
+    "Unq Users level complete": "count",
+}
+
+
+def _parse_amount(text):
+    # "$1,537.68" -> 1537.68 and "13.0%" -> 13.0; anything unparseable becomes NaN
+    try:
+        return float(text.replace("$", "").replace(",", "").replace("%", ""))
+    except ValueError:
+        return np.nan
+
+
+def file_version(path, *labels):
+    """
+    Version of one file for cache keys and the disk cache directory. Size and mtime
+    alone can coincide between files, so the labels and a hash of the absolute path
+    tie it to this file.
+    """
+    stat = os.stat(path)
+    location = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:12]
+    return "-".join(map(str, [*labels, location, stat.st_size, stat.st_mtime_ns]))
+
+
+def read_level_details(path):
+    """
+    Reads the schema columns of a level-details export, parsing numbers while reading.
+    """
+    converters = {col: _parse_amount for col, kind in LEVEL_SCHEMA.items() if kind in ("percent", "currency")}
+    dtypes = {col: "float64" for col, kind in LEVEL_SCHEMA.items() if kind == "number"}
+    df = pd.read_csv(path, usecols=list(LEVEL_SCHEMA), thousands=",", converters=converters, dtype=dtypes)
+    df = df[list(LEVEL_SCHEMA)]
+
+    for col, kind in LEVEL_SCHEMA.items():
+        if kind == "count" and df[col].dtype == object:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    df["Avg Coin Sink"] = round(df["Coin Sink"] / df["Unq Users level start"], 2)
+    return df
+
+
+@st.cache_data(show_spinner="Loading level details...")
+def _load_level_details(path, version):
+    df = read_level_details(path)
+    df.attrs["data_version"] = version
+    return df
+
+
+def load_level_details(path=LEVEL_CSV_PATH):
+    """
+    Typed level-details catalog, re-read only when the file changes.
+    """
+    return _load_level_details(path, file_version(path, "details"))
+
+
+def _partition_path(game, date, store_dir=LEVEL_STORE_DIR):
+    return os.path.join(store_dir, f"game={game}", f"date={date}", PART_NAME)
+
+
+def ingest_level_export(csv_path, game, date, store_dir=LEVEL_STORE_DIR):
+    """
+    Parses one export and writes it as the game/date partition, replacing any
+    earlier copy of the same snapshot.
+    """
+    date = datetime.date.fromisoformat(str(date)).isoformat()
+    path = _partition_path(game, date, store_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    pq.write_table(pa.Table.from_pandas(read_level_details(csv_path), preserve_index=False), tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def list_partitions(store_dir=LEVEL_STORE_DIR):
+    """
+    {game: [dates]} for every snapshot in the store, dates ascending. Only
+    directory names are read.
+    """
+    partitions = {}
+    if not os.path.isdir(store_dir):
+        return partitions
+    for game_dir in sorted(os.listdir(store_dir)):
+        if not game_dir.startswith("game="):
+            continue
+        game = game_dir[len("game="):]
+        dates = sorted(
+            d[len("date="):] for d in os.listdir(os.path.join(store_dir, game_dir))
+            if d.startswith("date=") and os.path.exists(os.path.join(store_dir, game_dir, d, PART_NAME))
+        )
+        if dates:
+            partitions[game] = dates
+    return partitions
+
+
+@st.cache_data(show_spinner="Loading level snapshot...")
+def _load_level_snapshot(path, version):
+    df = pq.read_table(path).to_pandas()
+    df.attrs["data_version"] = version
+    return df
+
+
+def load_level_snapshot(game, date, store_dir=LEVEL_STORE_DIR):
+    """
+    One game/date partition, cached until its file changes.
+    """
+    path = _partition_path(game, date, store_dir)
+    return _load_level_snapshot(path, file_version(path, game, date))
+
+
+def load_level_snapshots(game, dates, store_dir=LEVEL_STORE_DIR):
+    """
+    Several snapshots of one game stacked with a Snapshot Date column; only the
+    requested partitions are read.
+    """
+    frames = [load_level_snapshot(game, date, store_dir).assign(**{SNAPSHOT_COLUMN: date}) for date in dates]
+    return pd.concat(frames, ignore_index=True)
+
+
+def compare_snapshots(snapshots, metric, base_date, target_date):
+    """
+    Per-level change of `metric` between two snapshots, for levels present in both,
+    largest absolute change first.
+    """
+    wide = snapshots.pivot_table(index=LEVEL_COLUMN, columns=SNAPSHOT_COLUMN, values=metric, aggfunc="mean")
+    diff = wide[[base_date, target_date]].dropna()
+    diff.columns = ["Base", "Target"]
+    diff["Change"] = diff["Target"] - diff["Base"]
+    diff["Change %"] = (diff["Change"] / diff["Base"].where(diff["Base"] != 0) * 100).round(2)
+    return diff.reindex(diff["Change"].abs().sort_values(ascending=False).index).reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="add an export to the partitioned store")
+    ingest.add_argument("csv_path")
+    ingest.add_argument("--game", required=True)
+    ingest.add_argument("--date", required=True, help="snapshot date, YYYY-MM-DD")
+    ingest.add_argument("--store", default=LEVEL_STORE_DIR)
+    listing = commands.add_parser("list", help="show the games and dates in the store")
+    listing.add_argument("--store", default=LEVEL_STORE_DIR)
+
+    args = parser.parse_args()
+    if args.command == "ingest":
+        print(ingest_level_export(args.csv_path, args.game, args.date, args.store))
+    else:
+        for game, dates in list_partitions(args.store).items():
+            print(f"{game}: {len(dates)} snapshots, {dates[0]} to {dates[-1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.data_loader import frame_key
+
+Z_THRESHOLD = 3
+IQR_QUANTILES = (0.15, 0.85)
+IQR_FACTOR = 1.5
+# modified z-score cut-off (Iglewicz & Hoaglin); 0.6745 scales the MAD to σ for normal data
+MAD_THRESHOLD = 3.5
+MAD_SCALE = 0.6745
+
+OUTLIER_METHODS = ("Z-Score", "IQR (Percentiles)", "MAD (Robust)")
+
+
+def _flag_matrices(values):
+    # one boolean (rows x metrics) matrix per method; NaN cells are never flagged
+    with warnings.catch_warnings():
+        # all-NaN metrics are fine, they simply flag nothing
+        warnings.simplefilter("ignore", RuntimeWarning)
+        mean = np.nanmean(values, axis=0)
+        std = np.nanstd(values, axis=0, ddof=1)
+        low, high = np.nanquantile(values, IQR_QUANTILES, axis=0)
+        median = np.nanmedian(values, axis=0)
+        deviation = np.abs(values - median)
+        mad = np.nanmedian(deviation, axis=0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        zscore = np.abs(values - mean) / std
+        iqr = high - low
+        modified = MAD_SCALE * deviation / mad
+
+    return {
+        "Z-Score": zscore > Z_THRESHOLD,
+        "IQR (Percentiles)": (values < low - IQR_FACTOR * iqr) | (values > high + IQR_FACTOR * iqr),
+        # a metric with MAD 0 (mostly one value) has no robust spread to measure against
+        "MAD (Robust)": (modified > MAD_THRESHOLD) & (mad > 0),
+    }
+
+
+@st.cache_data(hash_funcs={pd.DataFrame: frame_key}, show_spinner=False)
+def score_outliers(df, columns):
+    """
+    Outlier flags for every level and metric in `columns` under each of OUTLIER_METHODS,
+    computed column-wise in one pass. Returns {method: boolean DataFrame} aligned
+    with df's index.
+    """
+    columns = list(columns)
+    values = df[columns].to_numpy(dtype=float)
+    return {
+        method: pd.DataFrame(flags, index=df.index, columns=columns)
+        for method, flags in _flag_matrices(values).items()
+    }
+
+
+def flagged_levels(df, flags, level_col, min_metrics=1):
+    """
+    Levels flagged on at least `min_metrics` metrics, with the count and names of
+    those metrics, most-flagged first.
+    """
+    counts = flags.sum(axis=1)
+    keep = counts >= min_metrics
+    names = flags[keep].apply(lambda row: ", ".join(row.index[row]), axis=1)
+    summary = pd.DataFrame({
+        level_col: df.loc[keep, level_col],
+        "Metrics Flagged": counts[keep],
+        "Flagged Metrics": names.reindex(counts[keep].index),
+    })
+    return summary.sort_values(["Metrics Flagged", level_col], ascending=[False, True]).reset_index(drop=True)
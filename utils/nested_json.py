@@ -0,0 +1,259 @@
+import json
+import re
+import threading
+from collections import Counter, defaultdict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# dotted key paths (list positions are skipped) whose string values are known to hold JSON
+EMBEDDED_PATHS = (
+    "IAPRecords",
+    "IAPRecords.IAPRecordBook",
+    "UserState",
+    "Analytics",
+)
+
+_WHITESPACE = " \t\r\n"
+
+_SPACE = re.compile(rb"[ \t\r\n]*")
+_STRING_STOP = re.compile(rb'["\\]')
+_NESTED_STOP = re.compile(rb'["{}\[\]]')
+_SCALAR_STOP = re.compile(rb"[ \t\r\n,}]")
+
+
+def loads(raw):
+    # orjson is much faster but stricter (no NaN literals, 64-bit ints), so fall back to json
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw)
+
+
+def looks_like_json(value):
+    """
+    Cheap check that a string is shaped like a JSON object or array, from its first
+    and last non-whitespace characters only.
+    """
+    if not value:
+        return False
+    first, last = value[0], value[-1]
+    if first in _WHITESPACE or last in _WHITESPACE:
+        value = value.strip(_WHITESPACE)
+        if not value:
+            return False
+        first, last = value[0], value[-1]
+    return (first == "{" and last == "}") or (first == "[" and last == "]")
+
+
+class NestedJSONDecoder:
+    """
+    Decodes JSON objects and arrays embedded as strings anywhere in a document.
+    Strings under `embedded_paths` are decoded directly; all others must first pass
+    looks_like_json, so plain strings never reach the JSON parser. Scalars such as
+    "123" or "true" stay strings.
+
+    With `strip_strings`, strings that stay strings come back with surrounding
+    whitespace removed, as the event parser has always returned them.
+
+    `stats` counts, per path, how many strings were tried and how many decoded. One
+    decoder may be shared between threads; the counters are updated under a lock.
+    """
+
+    def __init__(self, embedded_paths=EMBEDDED_PATHS, strip_strings=False):
+        self.embedded_paths = frozenset(embedded_paths)
+        self.strip_strings = strip_strings
+        self.stats = defaultdict(Counter)
+        self._stats_lock = threading.Lock()
+
+    def decode(self, obj, path=""):
+        if isinstance(obj, str):
+            return self._decode_string(obj, path)
+        if isinstance(obj, dict):
+            return {key: self.decode(value, f"{path}.{key}" if path else key) for key, value in obj.items()}
+        if isinstance(obj, list):
+            return [self.decode(item, path) for item in obj]
+        return obj
+
+    def _decode_string(self, value, path):
+        if self.strip_strings:
+            value = value.strip()
+        if path not in self.embedded_paths and not looks_like_json(value):
+            return value
+
+        self._count(path, "attempted")
+        try:
+            parsed = loads(value)
+        except ValueError:
+            return value
+        if not isinstance(parsed, (dict, list)):
+            return value
+
+        self._count(path, "decoded")
+        return self.decode(parsed, path)
+
+    def _count(self, path, outcome):
+        with self._stats_lock:
+            self.stats[path][outcome] += 1
+
+    def merge(self, summary):
+        """
+        Adds counts from another decoder's summary(), e.g. one run in a worker process.
+        """
+        with self._stats_lock:
+            for path, counts in summary.items():
+                self.stats[path].update(counts)
+
+    def summary(self):
+        with self._stats_lock:
+            return {path: dict(counts) for path, counts in sorted(self.stats.items())}
+
+
+class TopLevelFieldScanner:
+    """
+    Incremental scanner over a JSON object arriving in chunks. Keeps the raw bytes
+    of the wanted top-level fields only; every other value is stepped over by
+    tracking string and bracket state with regex searches, so large unused blobs
+    are never decoded or buffered. close() decodes the kept fields into a dict.
+    """
+
+    _OBJECT, _KEY, _KEY_STRING, _COLON, _VALUE, _NESTED, _SCALAR, _DONE = range(8)
+
+    def __init__(self, fields):
+        self.fields = frozenset(fields)
+        self._state = self._OBJECT
+        self._key = bytearray()
+        self._field = None
+        self._capture = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._values = {}
+
+    def feed(self, chunk):
+        pos, end = 0, len(chunk)
+        while pos < end:
+            state = self._state
+            if state in (self._OBJECT, self._KEY, self._COLON, self._VALUE, self._DONE):
+                pos = _SPACE.match(chunk, pos).end()
+                if pos == end:
+                    break
+                pos = self._token(chunk, pos)
+            elif state == self._KEY_STRING:
+                pos = self._scan_string(chunk, pos, self._key)
+                if not self._in_string:
+                    self._field = loads(b'"' + bytes(self._key) + b'"')
+                    self._state = self._COLON
+            elif state == self._NESTED:
+                pos = self._scan_nested(chunk, pos)
+            else:
+                match = _SCALAR_STOP.search(chunk, pos)
+                stop = match.start() if match else end
+                self._keep(chunk, pos, stop)
+                pos = stop
+                if match:
+                    self._finish_value()
+
+    def close(self):
+        if self._state != self._DONE:
+            raise ValueError("Truncated JSON object.")
+        return {field: loads(bytes(raw)) for field, raw in self._values.items()}
+
+    def _token(self, chunk, pos):
+        byte = chunk[pos:pos + 1]
+        state = self._state
+        if state == self._OBJECT and byte == b"{":
+            self._state = self._KEY
+        elif state == self._KEY and byte == b",":
+            pass
+        elif state == self._KEY and byte == b"}":
+            self._state = self._DONE
+        elif state == self._KEY and byte == b'"':
+            self._key.clear()
+            self._in_string = True
+            self._state = self._KEY_STRING
+        elif state == self._COLON and byte == b":":
+            self._state = self._VALUE
+        elif state == self._VALUE:
+            self._capture = bytearray() if self._field in self.fields else None
+            if byte in (b"{", b"[", b'"'):
+                self._depth = 0 if byte == b'"' else 1
+                self._in_string = byte == b'"'
+                self._state = self._NESTED
+                self._keep(chunk, pos, pos + 1)
+            else:
+                self._state = self._SCALAR
+                return pos
+        else:
+            raise ValueError(f"Unexpected {byte!r} in JSON object.")
+        return pos + 1
+
+    def _scan_string(self, chunk, pos, out):
+        # consumes string bytes up to and including the closing quote, honouring escapes
+        end = len(chunk)
+        while pos < end:
+            if self._escape:
+                self._escape = False
+                if out is not None:
+                    out += chunk[pos:pos + 1]
+                pos += 1
+                continue
+            match = _STRING_STOP.search(chunk, pos)
+            if match is None:
+                if out is not None:
+                    out += chunk[pos:]
+                return end
+            stop = match.start()
+            if chunk[stop:stop + 1] == b"\\":
+                self._escape = True
+                if out is not None:
+                    out += chunk[pos:stop + 1]
+                pos = stop + 1
+            else:
+                self._in_string = False
+                if out is not None:
+                    out += chunk[pos:stop] if out is self._key else chunk[pos:stop + 1]
+                return stop + 1
+        return pos
+
+    def _scan_nested(self, chunk, pos):
+        end = len(chunk)
+        while pos < end:
+            if self._in_string:
+                pos = self._scan_string(chunk, pos, self._capture)
+                if not self._in_string and self._depth == 0:
+                    self._finish_value()
+                    return pos
+                continue
+            match = _NESTED_STOP.search(chunk, pos)
+            if match is None:
+                self._keep(chunk, pos, end)
+                return end
+            stop = match.start()
+            byte = chunk[stop:stop + 1]
+            self._keep(chunk, pos, stop + 1)
+            pos = stop + 1
+            if byte == b'"':
+                self._in_string = True
+            elif byte in (b"{", b"["):
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish_value()
+                    return pos
+        return pos
+
+    def _keep(self, chunk, start, stop):
+        if self._capture is not None:
+            self._capture += chunk[start:stop]
+
+    def _finish_value(self):
+        if self._capture is not None:
+            self._values[self._field] = self._capture
+        self._capture = None
+        self._state = self._KEY
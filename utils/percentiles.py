@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from utils.compute_cache import memoize
+
+
+@memoize
+def build_percentile_index(df, columns, subset=None):
+    """
+    Sorted values of each column, built once per data version so percentile
+    lookups become binary searches. Rows missing any `subset` column
+    (default: `columns`) are left out, matching a dropna over those columns.
+    """
+    rows = df.dropna(subset=list(subset or columns))
+    return {col: np.sort(rows[col].to_numpy(dtype=float)) for col in columns}
+
+
+def percentile_of(sorted_values, scores, kind="rank"):
+    """
+    Vectorized scipy.stats.percentileofscore against an already sorted distribution.
+    """
+    scores = np.asarray(scores, dtype=float)
+    n = len(sorted_values)
+    left = np.searchsorted(sorted_values, scores, side="left")
+    right = np.searchsorted(sorted_values, scores, side="right")
+
+    if kind == "rank":
+        return (left + right + (right > left)) * (50.0 / n)
+    elif kind == "weak":
+        return right * (100.0 / n)
+    elif kind == "strict":
+        return left * (100.0 / n)
+    elif kind == "mean":
+        return (left + right) * (50.0 / n)
+    raise ValueError(f"Unknown percentile kind: {kind}")
+
+
+def percentile_frame(index, frame, kind="rank"):
+    """
+    Percentile of every cell in `frame`, each column scored against its own index entry.
+    """
+    return pd.DataFrame(
+        {col: percentile_of(index[col], frame[col], kind) for col in frame.columns},
+        index=frame.index
+    )
@@ -1,5 +1,91 @@
+import ast
+import functools
+import importlib
+import os
+import threading
+
 import streamlit as st
 
+from utils.data_loader import load_main_data
+
+QUESTIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "questions")
+METADATA_NAMES = ("CATEGORY", "QUESTIONS", "PRELOAD")
+
+_preload_lock = threading.Lock()
+_preload_thread = None
+
+
+def _read_metadata(path):
+    # module-level literal assignments only; the module itself is never executed
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    metadata = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1:
+            target = node.targets[0]
+            if isinstance(target, ast.Name) and target.id in METADATA_NAMES:
+                metadata[target.id] = ast.literal_eval(node.value)
+    return metadata
+
+
+@functools.lru_cache(maxsize=None)
+def load_registry(questions_dir=QUESTIONS_DIR):
+    """
+    Discovers question modules from their CATEGORY, QUESTIONS and PRELOAD literals
+    without importing them. Returns the sidebar layout {category: [labels]},
+    ordered by each category's lowest question number, and
+    {question number: (module name, preload modules)}.
+    """
+    categories = {}
+    questions = {}
+    for dirpath, dirnames, filenames in os.walk(questions_dir):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("__"))
+        for filename in sorted(f for f in filenames if f.endswith(".py")):
+            path = os.path.join(dirpath, filename)
+            metadata = _read_metadata(path)
+            if "QUESTIONS" not in metadata:
+                continue
+
+            relative = os.path.relpath(path, os.path.dirname(questions_dir))
+            module = os.path.splitext(relative)[0].replace(os.sep, ".")
+            preload = tuple(metadata.get("PRELOAD", ()))
+            for number, text in metadata["QUESTIONS"].items():
+                if number in questions:
+                    raise ValueError(f"Q{number} is declared by both {questions[number][0]} and {module}")
+                questions[number] = (module, preload)
+                categories.setdefault(metadata["CATEGORY"], []).append((number, f"Q{number}: {text}"))
+
+    layout = {
+        category: [label for _, label in sorted(entries)]
+        for category, entries in sorted(categories.items(), key=lambda item: min(item[1])[0])
+    }
+    return layout, questions
+
+
+def _import_all(modules):
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+
+def preload_dependencies():
+    """
+    Imports every question's PRELOAD modules on a daemon thread, once per process,
+    so heavy libraries are ready before their question is first opened.
+    """
+    global _preload_thread
+    with _preload_lock:
+        if _preload_thread is not None:
+            return
+        _, questions = load_registry()
+        modules = sorted({name for _, preload in questions.values() for name in preload})
+        _preload_thread = threading.Thread(target=_import_all, args=(modules,), name="question-preload", daemon=True)
+        _preload_thread.start()
+
+
 def render_question(question_text):
     try:
         qnum = int(question_text.split(":")[0].replace("Q", ""))
@@ -7,51 +93,15 @@ def render_question(question_text):
         st.warning("Invalid question format")
         return
 
-    if qnum == 1:
-        from questions.purchase.q1_user_levels import render
-    elif qnum == 2:
-        from questions.purchase.q2_time_to_first_purchase import render
-    elif qnum == 3:
-        from questions.purchase.q3_most_purchased_items import render
-    elif qnum == 4:
-        from questions.purchase.q4_purchasers_session_count import render
-    elif qnum == 5:
-        from questions.purchase.q5_repeat_vs_single import render
-    elif qnum == 6:
-        from questions.purchase.q6_purchase_sequence import render
-    elif qnum == 7:
-        from questions.purchase.q7_user_purchase_frequency import render
-    elif qnum == 8:
-        from questions.purchase.q8_lifecycle_vs_purchases import render
-    elif qnum == 9:
-        from questions.purchase.q9_ltv_first_purchase_grouping import render
-    elif qnum == 10:
-        from questions.purchase.q10_session_vs_spend import render
-    elif qnum == 11:
-        from questions.segmentation.q11_user_spend import render
-    elif qnum == 12:
-        from questions.segmentation.q12_persona_analysis import render
-    elif qnum == 13:
-        from questions.segmentation.q13_engagement_correlation import render
-    elif qnum == 14:
-        from questions.segmentation.q14_engagement_by_spend_tier import render
-    elif 18 <= qnum <= 22:
-        from questions.ad_monetization.q18_to_q22_placeholder import render
-    elif 23 <= qnum <= 26:
-        from questions.intent_conversion.q23_to_q26_placeholder import render
-    elif 27 <= qnum <= 29:
-        from questions.timing_session.q27_to_q29_placeholder import render
-    elif 30 <= qnum <= 33:
-        from questions.churn_lifecycle.q30_to_q33_placeholder import render
-    elif 34 <= qnum <= 39:
-        from questions.gameplay_economy.q34_to_q39_placeholder import render
-    elif 40 <= qnum <= 42:
-        from questions.predictive.q40_to_q42_placeholder import render
-    elif 43 <= qnum <= 47:
-        from questions.cohort_funnel.q43_to_q47_placeholder import render
-    else:
-        render = lambda: st.warning("Question not implemented.")
-
-    render()
-
+    _, questions = load_registry()
+    if qnum not in questions:
+        st.warning("Question not implemented.")
+        return
+    question = importlib.import_module(questions[qnum][0])
 
+    # implemented questions declare the columns they read and get only that slice
+    columns = getattr(question, "COLUMNS", None)
+    if columns is None:
+        question.render()
+    else:
+        question.render(load_main_data(columns))
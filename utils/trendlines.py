@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.data_loader import frame_key
+from utils.trimming import trim_quantiles
+
+DEGREES = (1, 2, 3)
+GRID_SIZE = 200
+# |R[j, j]| below this fraction of |R[0, 0]| means column j is a combination of the earlier ones
+RANK_TOLERANCE = 1e-10
+
+
+def filter_frame(df, filter_col, filter_range, trim_cols=()):
+    """
+    The Exploration section's row selection: a range filter on one column, then
+    progressive 1%-99% trimming of the chosen axes.
+    """
+    dff = df[(df[filter_col] >= filter_range[0]) & (df[filter_col] <= filter_range[1])]
+    if trim_cols:
+        dff = trim_quantiles(dff, list(trim_cols), 0.01, 0.99, mode="progressive")
+    return dff
+
+
+def _r2(y, fitted):
+    ss_res = np.sum((y - fitted) ** 2)
+    ss_tot = np.sum((y - y.mean()) ** 2)
+    if ss_tot == 0:
+        return 1.0 if ss_res == 0 else 0.0
+    return 1 - ss_res / ss_tot
+
+
+def fit_polynomials(x, y, degrees=DEGREES, grid_size=GRID_SIZE):
+    """
+    Least-squares polynomial fits of every degree from one QR factorisation of the
+    Vandermonde matrix: the first k columns of Q span the degree k-1 model, so each
+    fit only needs a k x k triangular solve. x is scaled to [-1, 1] for conditioning.
+
+    With fewer distinct x values than coefficients, the higher columns add nothing
+    but rounding noise, so such a degree repeats the highest fit the data supports,
+    with zero coefficients above it; best_fit then keeps the lower degree.
+
+    Returns the evaluation grid and, per degree, coefficients (in scaled x), R²,
+    grid predictions and the residual standard deviation used for the band.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    center = (x.max() + x.min()) / 2
+    half_span = (x.max() - x.min()) / 2 or 1.0
+    scaled = (x - center) / half_span
+
+    q, r = np.linalg.qr(np.vander(scaled, max(degrees) + 1, increasing=True))
+    qty = q.T @ y
+
+    # leading columns that are independent of the ones before them
+    diagonal = np.abs(np.diag(r))
+    independent = diagonal > RANK_TOLERANCE * diagonal[0]
+    rank = len(diagonal) if independent.all() else int(np.argmin(independent))
+
+    grid = np.linspace(x.min(), x.max(), grid_size)
+    grid_vander = np.vander((grid - center) / half_span, max(degrees) + 1, increasing=True)
+
+    fits = {}
+    for degree in degrees:
+        k = min(degree + 1, rank)
+        coef = np.zeros(degree + 1)
+        coef[:k] = np.linalg.solve(r[:k, :k], qty[:k])
+        fitted = q[:, :k] @ qty[:k]
+        grid_pred = grid_vander[:, :degree + 1] @ coef
+        fits[degree] = {
+            "coef": coef,
+            "r2": _r2(y, fitted),
+            "pred": grid_pred,
+            # residuals against the drawn curve, as the band is drawn around it
+            "std": np.std(y - np.interp(x, grid, grid_pred)),
+        }
+    return {"grid": grid, "fits": fits}
+
+
+@st.cache_data(hash_funcs={pd.DataFrame: frame_key}, show_spinner=False)
+def fit_trendlines(df, xcol, ycol, filter_col, filter_range, trim_cols=()):
+    """
+    fit_polynomials on the Exploration selection, cached per frame, column pair,
+    filter range and outlier flags. Rows missing x or y are left out.
+    """
+    dff = filter_frame(df, filter_col, filter_range, trim_cols)
+    x = dff[xcol].to_numpy(dtype=float)
+    y = dff[ycol].to_numpy(dtype=float)
+    keep = np.isfinite(x) & np.isfinite(y)
+    if keep.sum() <= 2:
+        return None
+    return fit_polynomials(x[keep], y[keep])
+
+
+def best_fit(trend, degrees):
+    """
+    The degree with the highest R² among `degrees`; ties keep the lower degree.
+    """
+    best = degrees[0]
+    for degree in degrees[1:]:
+        if trend["fits"][degree]["r2"] > trend["fits"][best]["r2"]:
+            best = degree
+    return best
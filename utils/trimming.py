@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+
+def quantile_mask(df, columns, lower=0.01, upper=0.99, mode="independent"):
+    """
+    Boolean row mask keeping values within each column's [lower, upper] quantiles,
+    plus the bounds used (rows: lower/upper, columns: `columns`).
+
+    mode="independent" takes every column's bounds from the full frame in one
+    quantile call. mode="progressive" takes each column's bounds from the rows
+    left after trimming the previous columns, as chained filters would.
+    """
+    columns = list(dict.fromkeys(columns))
+    values = df[columns].to_numpy(dtype=float)
+
+    if mode == "independent":
+        bounds = df[columns].quantile([lower, upper])
+        lo, hi = bounds.to_numpy(dtype=float)
+        mask = ((values >= lo) & (values <= hi)).all(axis=1)
+    elif mode == "progressive":
+        mask = np.ones(len(df), dtype=bool)
+        bounds = pd.DataFrame(index=[lower, upper], columns=columns, dtype=float)
+        for i, col in enumerate(columns):
+            bounds[col] = pd.Series(values[mask, i]).quantile([lower, upper]).to_numpy()
+            mask &= (values[:, i] >= bounds[col].iloc[0]) & (values[:, i] <= bounds[col].iloc[1])
+    else:
+        raise ValueError(f"Unknown trimming mode: {mode}")
+
+    return mask, bounds
+
+
+def trim_quantiles(df, columns, lower=0.01, upper=0.99, mode="independent"):
+    """
+    Rows of `df` whose values lie within the quantile bounds of every column.
+    """
+    mask, _ = quantile_mask(df, columns, lower, upper, mode)
+    return df[mask]
@@ -0,0 +1,83 @@
+import pandas as pd
+import streamlit as st
+
+from utils.data_loader import frame_key
+
+USER_ID = "user_data.user_id"
+USD_VALUE = "adjust_post_events_iap.adj_converted_usd_value_dimension"
+SESSION = "adjust_post_events_iap.adj_session_count"
+LEVEL = "adjust_post_events_iap.user_level_linear"
+PRODUCT = "adjust_post_events_iap.adj_product_id"
+TIMESTAMP = "adjust_post_events_iap.adj_event_timestamp_time"
+LEVELS_COMPLETED = "lifetime_status_lifetime_level_completed"
+PURCHASE_ORDER = "adjust_post_events_iap.adj_purchase_order"
+
+FACT_COLUMNS = {
+    USER_ID: "string",
+    USD_VALUE: "float64",
+    SESSION: "float64",
+    LEVEL: "float64",
+    PRODUCT: "string",
+    TIMESTAMP: "string",
+    LEVELS_COMPLETED: "float64",
+    PURCHASE_ORDER: "float64",
+}
+
+
+@st.cache_data(hash_funcs={pd.DataFrame: frame_key}, show_spinner="Building per-user summary...")
+def build_user_facts(df):
+    """
+    One row per user. Each group of columns is computed over the rows its
+    question has always used, so sharing the table does not change any result:
+
+    - event_count: all of the user's rows (Q5)
+    - purchase_count, total_spend: rows with a USD value (Q11)
+    - max_session, session_spend: rows with a USD value and a session count (Q10)
+    - levels_completed, ordered_purchases, levelled_spend: rows with a USD value
+      and levels completed; ordered_purchases counts purchase orders (Q7)
+    - first_purchase_time/level/product, complete_spend: rows with a timestamp,
+      USD value, level and product (Q9)
+
+    Users with no qualifying rows have NaN in that group (0 for the Q11 pair).
+    """
+    df = df.dropna(subset=[USER_ID])
+    purchases = df[df[USD_VALUE].notna()]
+
+    facts = df[USER_ID].value_counts().rename("event_count").to_frame()
+    facts = facts.join(
+        purchases.groupby(USER_ID).agg(
+            purchase_count=(USD_VALUE, "count"),
+            total_spend=(USD_VALUE, "sum"),
+        )
+    )
+    facts = facts.join(
+        purchases.dropna(subset=[SESSION]).groupby(USER_ID).agg(
+            max_session=(SESSION, "max"),
+            session_spend=(USD_VALUE, "sum"),
+        )
+    )
+    facts = facts.join(
+        purchases.dropna(subset=[LEVELS_COMPLETED]).groupby(USER_ID).agg(
+            levels_completed=(LEVELS_COMPLETED, "first"),
+            ordered_purchases=(PURCHASE_ORDER, "count"),
+            levelled_spend=(USD_VALUE, "sum"),
+        )
+    )
+
+    complete = purchases.dropna(subset=[TIMESTAMP, LEVEL, PRODUCT])
+    first_purchases = (
+        complete.sort_values(TIMESTAMP)
+        .drop_duplicates(USER_ID)
+        .set_index(USER_ID)
+    )
+    facts = facts.join(first_purchases[[TIMESTAMP, LEVEL, PRODUCT]].rename(columns={
+        TIMESTAMP: "first_purchase_time",
+        LEVEL: "first_purchase_level",
+        PRODUCT: "first_purchase_product",
+    }))
+    facts = facts.join(complete.groupby(USER_ID)[USD_VALUE].sum().rename("complete_spend"))
+
+    facts["purchase_count"] = facts["purchase_count"].fillna(0).astype(int)
+    facts["total_spend"] = facts["total_spend"].fillna(0.0)
+    facts.index.name = USER_ID
+    return facts.sort_index()
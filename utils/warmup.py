@@ -0,0 +1,153 @@
+"""
+Precomputes every implemented question for a data version so the first dashboard
+visit after an export reads results from the disk cache.
+
+Started in the background by utils.data_loader when it converts a new export, or
+run by hand (e.g. from cron after the export lands):
+
+    python -m utils.warmup --workers 4
+"""
+import argparse
+import importlib
+import inspect
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.compute_cache import DISK_CACHE_DIR, cache_dir, memoized_functions
+from utils.data_loader import data_version, load_main_data
+from utils.question_router import load_registry
+
+ENABLED = os.environ.get("SHOP_WARMUP", "1") != "0"
+WORKERS = int(os.environ.get("SHOP_WARMUP_WORKERS", min(4, os.cpu_count() or 1)))
+LOCK_NAME = ".warmup.lock"
+DONE_NAME = ".warmup.done"
+# a lock older than this is left over from a crashed run
+STALE_LOCK_SECONDS = 3600
+# other cache directories untouched for this long are no longer written by any process
+STALE_CACHE_SECONDS = 24 * 3600
+
+
+def _version_dir(version):
+    return cache_dir(version)
+
+
+def _acquire_lock(path):
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) < STALE_LOCK_SECONDS:
+                    return False
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            continue
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        return True
+    return False
+
+
+def _prune(current):
+    # results of older exports or older code are never read again, but a process still
+    # running older code keeps writing to its directory, which keeps its mtime fresh
+    cutoff = time.time() - STALE_CACHE_SECONDS
+    for entry in os.listdir(DISK_CACHE_DIR):
+        path = os.path.join(DISK_CACHE_DIR, entry)
+        try:
+            stale = entry != current and os.path.isdir(path) and os.path.getmtime(path) < cutoff
+        except FileNotFoundError:
+            continue
+        if stale:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _warm_module(module_name):
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    if not hasattr(module, "COLUMNS"):
+        return module_name, [], 0.0
+
+    df = load_main_data(module.COLUMNS)
+    warmed = []
+    for func in memoized_functions(module_name):
+        # only steps that need nothing but the question's frame can be run ahead of time
+        if list(inspect.signature(func).parameters) == ["df"]:
+            func(df)
+            warmed.append(func.__name__)
+    return module_name, warmed, time.perf_counter() - started
+
+
+def warm(version, workers=WORKERS):
+    """
+    Runs the compute functions of every question for `version` in a process pool;
+    memoize persists each result under DISK_CACHE_DIR, per data and code version. A lock file keeps concurrent
+    callers from warming the same version twice. Returns False when the version is
+    already warm or being warmed elsewhere.
+    """
+    version_dir = _version_dir(version)
+    os.makedirs(version_dir, exist_ok=True)
+    if os.path.exists(os.path.join(version_dir, DONE_NAME)):
+        return False
+    lock_path = os.path.join(version_dir, LOCK_NAME)
+    if not _acquire_lock(lock_path):
+        return False
+
+    try:
+        _, questions = load_registry()
+        modules = sorted({module for module, _ in questions.values()})
+        with ProcessPoolExecutor(workers) as pool:
+            for module_name, warmed, seconds in pool.map(_warm_module, modules):
+                if warmed:
+                    print(f"{module_name}: {', '.join(warmed)} in {seconds:.1f}s", flush=True)
+
+        open(os.path.join(version_dir, DONE_NAME), "w").close()
+        _prune(os.path.basename(version_dir))
+    finally:
+        os.remove(lock_path)
+    return True
+
+
+def start_warmup(version):
+    """
+    Warms `version` in a detached process, unless disabled with SHOP_WARMUP=0 or
+    already done for the current code.
+    """
+    if not ENABLED or DISK_CACHE_DIR is None:
+        return
+    if os.path.exists(os.path.join(_version_dir(version), DONE_NAME)):
+        return
+    subprocess.Popen(
+        [sys.executable, "-m", "utils.warmup", "--version", version],
+        cwd=os.getcwd(),
+        stdin=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--version", help="data version to warm; defaults to the current export")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+
+    # the workers load data through data_version(), which must not start warmups of its own
+    global ENABLED
+    ENABLED = False
+    os.environ["SHOP_WARMUP"] = "0"
+
+    version = args.version or data_version()
+    started = time.perf_counter()
+    if warm(version, args.workers):
+        print(f"Warmed {version} in {time.perf_counter() - started:.1f}s", flush=True)
+    else:
+        print(f"{version} is already warm or being warmed", flush=True)
+
+
+if __name__ == "__main__":
+    main()